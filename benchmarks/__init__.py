@@ -0,0 +1,5 @@
+"""Benchmarks do pipeline do dashboard com dados sintéticos do Reclame Aqui.
+
+    python -m benchmarks --linhas 100000 1000000
+    python -m benchmarks.comparar antes.json depois.json
+"""
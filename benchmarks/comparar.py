@@ -0,0 +1,41 @@
+"""Compara dois relatórios de `benchmarks.executar`, etapa por etapa.
+
+    python -m benchmarks.comparar antes.json depois.json
+"""
+import argparse
+import json
+
+import pandas as pd
+
+
+def _tabela(relatorio):
+    return pd.DataFrame([
+        {'linhas': resultado['linhas'], 'etapa': nome, 'mediana_s': tempo['mediana_s']}
+        for resultado in relatorio['resultados']
+        for nome, tempo in resultado['etapas'].items()
+    ]).set_index(['linhas', 'etapa'])['mediana_s']
+
+
+def comparar(antes, depois):
+    """Medianas dos dois relatórios e a razão depois/antes, para os tamanhos e etapas em comum."""
+    tabela = pd.concat({'antes_s': _tabela(antes), 'depois_s': _tabela(depois)}, axis=1, join='inner')
+    tabela['razao'] = tabela['depois_s'] / tabela['antes_s']
+    return tabela
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('antes')
+    parser.add_argument('depois')
+    opcoes = parser.parse_args(argumentos)
+
+    relatorios = []
+    for caminho in (opcoes.antes, opcoes.depois):
+        with open(caminho, encoding='utf-8') as arquivo:
+            relatorios.append(json.load(arquivo))
+    print(f"{relatorios[0]['commit']} -> {relatorios[1]['commit']}")
+    print(comparar(*relatorios).to_string(float_format='{:.4f}'.format))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""Mede cada etapa do pipeline em arquivos sintéticos de vários tamanhos.
+
+O resultado é um relatório JSON com o commit, as versões das bibliotecas e,
+para cada tamanho, os tempos de cada etapa, para comparar execuções entre
+commits com `benchmarks.comparar`.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks import gerador
+from reclameaqui import agregados, dados, figuras
+from reclameaqui.densidade import kde_em_contagens
+
+DIRETORIO_RESULTADOS = dados.DIRETORIO_DADOS / '.cache' / 'benchmarks'
+
+
+def _leitura_csv(contexto):
+    contexto['bruto'] = pd.read_csv(contexto['csv'], dtype=dados.ESQUEMA)
+    return len(contexto['bruto'])
+
+
+def _montar_datas(contexto):
+    bruto = contexto['bruto']
+    return len(dados.montar_datas(bruto['ANO'], bruto['MES'], bruto['DIA']))
+
+
+def _preparar_dados(contexto):
+    contexto['DF'] = dados.preparar_dados(contexto['bruto'].copy())
+    return len(contexto['DF'])
+
+
+def _value_counts(contexto):
+    contexto['agregados'] = agregados.agregar(contexto['DF'])
+    return len(contexto['DF'])
+
+
+def _kde(contexto):
+    tamanhos = contexto['agregados'].tamanhos
+    centros = (tamanhos.index.to_numpy(dtype='float64') + 0.5) * agregados.LARGURA_CLASSE_TAMANHO
+    kde_em_contagens(centros, agregados.LARGURA_CLASSE_TAMANHO, pesos=tamanhos.to_numpy())
+    return len(tamanhos)
+
+
+def _construir_figuras(contexto):
+    contexto['figuras'] = figuras.figuras_empresa(contexto['agregados'])
+    return len(contexto['figuras'])
+
+
+def _serializar_figuras(contexto):
+    return sum(len(figura.to_json()) for figura in contexto['figuras'].values())
+
+
+# Etapas na ordem do pipeline; cada uma depende do que as anteriores deixaram
+# no contexto e devolve o número de itens processados
+ETAPAS = {
+    'leitura_csv': _leitura_csv,
+    'montar_datas': _montar_datas,
+    'preparar_dados': _preparar_dados,
+    'value_counts': _value_counts,
+    'kde': _kde,
+    'construir_figuras': _construir_figuras,
+    'serializar_figuras': _serializar_figuras,
+}
+
+
+def medir(caminho_csv, repeticoes=3, etapas=None):
+    """Tempos de cada etapa sobre `caminho_csv`, em segundos.
+
+    O pipeline inteiro é repetido `repeticoes` vezes; para cada etapa ficam
+    todos os tempos, o mínimo e a mediana.
+    """
+    etapas = list(etapas or ETAPAS)
+    tempos = {nome: [] for nome in etapas}
+    itens = {}
+    for _ in range(repeticoes):
+        contexto = {'csv': caminho_csv}
+        for nome in etapas:
+            inicio = time.perf_counter()
+            itens[nome] = ETAPAS[nome](contexto)
+            tempos[nome].append(time.perf_counter() - inicio)
+    return {
+        nome: {
+            'minimo_s': min(tempos[nome]),
+            'mediana_s': statistics.median(tempos[nome]),
+            'tempos_s': tempos[nome],
+            'itens': itens[nome],
+        }
+        for nome in etapas
+    }
+
+
+def commit_atual():
+    """Commit do repositório, com '-dirty' se houver alterações não gravadas."""
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty', '--abbrev=40'], capture_output=True,
+                              text=True, cwd=dados.DIRETORIO_DADOS, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _ambiente():
+    import plotly
+    import plotly.graph_objects  # noqa: F401
+    import plotly.subplots  # noqa: F401
+
+    return {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'processador': platform.processor() or platform.machine(),
+        'bibliotecas': {'pandas': pd.__version__, 'numpy': np.__version__, 'plotly': plotly.__version__},
+    }
+
+
+def executar(tamanhos, repeticoes=3, semente=0, etapas=None, diretorio=None):
+    """Gera um CSV para cada tamanho em `tamanhos`, mede as etapas e devolve o relatório."""
+    # O ambiente importa o plotly, que assim não entra no tempo das primeiras figuras
+    ambiente = _ambiente()
+    resultados = []
+    with tempfile.TemporaryDirectory(dir=diretorio) as temporario:
+        for linhas in tamanhos:
+            caminho = Path(temporario) / f'RECLAMEAQUI_SINTETICO_{linhas}.csv'
+            inicio = time.perf_counter()
+            gerador.gravar_csv(caminho, linhas, semente=semente)
+            geracao = time.perf_counter() - inicio
+            resultados.append({
+                'linhas': linhas,
+                'bytes_csv': caminho.stat().st_size,
+                'geracao_s': geracao,
+                'etapas': medir(caminho, repeticoes, etapas),
+            })
+            caminho.unlink()
+    return {
+        'commit': commit_atual(),
+        'data': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'ambiente': ambiente,
+        'parametros': {'repeticoes': repeticoes, 'semente': semente},
+        'resultados': resultados,
+    }
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000, 100_000], help='tamanhos dos arquivos gerados')
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--semente', type=int, default=0)
+    parser.add_argument('--etapas', nargs='+', choices=list(ETAPAS), help='mede só estas etapas (e as anteriores)')
+    parser.add_argument('--saida', type=Path, help='arquivo JSON do relatório (padrão: .cache/benchmarks/<commit>.json)')
+    opcoes = parser.parse_args(argumentos)
+
+    etapas = None
+    if opcoes.etapas:
+        # Uma etapa depende de todas as anteriores
+        ultima = max(list(ETAPAS).index(nome) for nome in opcoes.etapas)
+        etapas = list(ETAPAS)[:ultima + 1]
+
+    relatorio = executar(opcoes.linhas, opcoes.repeticoes, opcoes.semente, etapas)
+    saida = opcoes.saida or DIRETORIO_RESULTADOS / f"{(relatorio['commit'] or 'sem-commit')[:12]}.json"
+    saida.parent.mkdir(parents=True, exist_ok=True)
+    saida.write_text(json.dumps(relatorio, indent=2, ensure_ascii=False), encoding='utf-8')
+
+    for resultado in relatorio['resultados']:
+        print(f"{resultado['linhas']} linhas ({resultado['bytes_csv'] / 1e6:.1f} MB)")
+        for nome, tempo in resultado['etapas'].items():
+            print(f"  {nome:<20} {tempo['mediana_s'] * 1000:10.1f} ms")
+    print(f'Relatório gravado em {saida}')
@@ -0,0 +1,122 @@
+"""Gerador de arquivos RECLAMEAQUI_*.csv sintéticos, no esquema real.
+
+As colunas e os tipos seguem `reclameaqui.dados.ESQUEMA`. Uma fração das
+linhas recebe datas inválidas (dia além do fim do mês ou dia zero) e outra
+fração recebe descrições muito longas, para exercitar os mesmos caminhos que
+os arquivos coletados.
+"""
+import numpy as np
+import pandas as pd
+
+from reclameaqui import dados
+
+COLUNAS = list(dados.ESQUEMA)
+
+STATUS = ['Resolvido', 'Respondida', 'Em réplica', 'Não resolvido', 'Não respondida']
+PESOS_STATUS = [0.42, 0.33, 0.12, 0.10, 0.03]
+
+LOCAIS = [
+    'Fortaleza - CE', 'Recife - PE', 'Natal - RN', 'Teresina - PI', 'São Luís - MA', 'João Pessoa - PB',
+    'Salvador - BA', 'Maceió - AL', 'Aracaju - SE', 'Manaus - AM', 'Belém - PA', 'Caucaia - CE',
+    'Maracanaú - CE', 'Juazeiro do Norte - CE', 'Sobral - CE', 'Campina Grande - PB', 'Mossoró - RN',
+    'Olinda - PE', 'Jaboatão dos Guararapes - PE', 'Caruaru - PE', 'Parnaíba - PI', 'Imperatriz - MA',
+    'Feira de Santana - BA', 'Goiânia - GO', 'Brasília - DF', 'São Paulo - SP', 'Rio de Janeiro - RJ',
+    'Belo Horizonte - MG', 'Curitiba - PR', 'Porto Alegre - RS',
+]
+
+CATEGORIAS = [
+    'Loja Física', 'Loja Online', 'Entrega', 'Produto danificado', 'Problemas com o Atendimento',
+    'Canais de Atendimento', 'Informática', 'Celulares', 'Garantia', 'Estorno', 'Cobrança indevida',
+    'Troca', 'Planos de Saúde', 'Rede de Atendimento', 'Demora na execução', 'Qualidade do serviço prestado',
+]
+
+PALAVRAS = (
+    'comprei um produto na loja e até hoje não recebi o pedido atendimento péssimo já liguei várias vezes '
+    'ninguém resolve prazo de entrega vencido quero o estorno do valor pago nota fiscal garantia '
+    'assistência técnica defeito troca cancelamento da compra protocolo procon, descaso "urgente" '
+    'notebook celular televisão geladeira consulta exame autorização plano médico hospital demora'
+).split()
+
+_EMPRESA = 'Empresa Sintética'
+_URL = 'https://www.reclameaqui.com.br//empresa-sintetica/'
+
+# Descrições são sorteadas de um conjunto fixo, montado uma vez por chamada
+_TAMANHO_CONJUNTO = 2048
+_TAMANHO_CONJUNTO_LONGAS = 16
+
+
+def _textos(rng, quantidade, media, desvio, minimo=20):
+    """`quantidade` textos com tamanhos em distribuição log-normal."""
+    sigma = np.sqrt(np.log1p((desvio / media) ** 2))
+    tamanhos = np.maximum(rng.lognormal(np.log(media) - sigma ** 2 / 2, sigma, quantidade), minimo).astype(int)
+    textos = []
+    for tamanho in tamanhos:
+        palavras = rng.choice(PALAVRAS, tamanho // 6 + 1)
+        textos.append(' '.join(palavras)[:tamanho].capitalize())
+    return np.array(textos, dtype=object)
+
+
+def gerar(linhas, semente=0, primeiro_id=1, inicio='2012-01-01', fim='2023-12-31',
+          fracao_datas_invalidas=0.002, fracao_descricoes_longas=0.005):
+    """DataFrame sintético de `linhas` reclamações, reprodutível pela `semente`."""
+    rng = np.random.default_rng(semente)
+
+    inicio, fim = np.datetime64(inicio, 'D'), np.datetime64(fim, 'D')
+    datas = inicio + rng.integers(0, (fim - inicio).astype(int) + 1, linhas)
+    ano = datas.astype('datetime64[Y]').astype(int) + 1970
+    mes = datas.astype('datetime64[M]').astype(int) % 12 + 1
+    dia = (datas - datas.astype('datetime64[M]')).astype(int) + 1
+    dia_do_ano = (datas - datas.astype('datetime64[Y]')).astype(int) + 1
+    # 01/01/1970 foi uma quinta-feira; segunda-feira é 0, como nos arquivos coletados
+    dia_da_semana = (datas.astype(int) + 3) % 7
+    semana_do_ano = pd.DatetimeIndex(datas).isocalendar().week.to_numpy(dtype=int)
+
+    # Datas inválidas: metade com 30/02, metade com dia zero
+    invalidas = np.flatnonzero(rng.random(linhas) < fracao_datas_invalidas)
+    metade = len(invalidas) // 2
+    mes[invalidas[:metade]], dia[invalidas[:metade]] = 2, 30
+    dia[invalidas[metade:]] = 0
+
+    descricoes = _textos(rng, _TAMANHO_CONJUNTO, media=950, desvio=800)[rng.integers(0, _TAMANHO_CONJUNTO, linhas)]
+    longas = np.flatnonzero(rng.random(linhas) < fracao_descricoes_longas)
+    descricoes[longas] = _textos(rng, _TAMANHO_CONJUNTO_LONGAS, media=20000, desvio=8000)[
+        rng.integers(0, _TAMANHO_CONJUNTO_LONGAS, len(longas))]
+
+    temas = _textos(rng, 256, media=35, desvio=15, minimo=8)[rng.integers(0, 256, linhas)]
+    categorias = np.array([
+        '<->'.join(rng.choice(CATEGORIAS, rng.integers(1, 4), replace=False).tolist() + [_EMPRESA])
+        for _ in range(256)
+    ], dtype=object)[rng.integers(0, 256, linhas)]
+
+    ids = primeiro_id + np.arange(linhas, dtype='int64')
+    DF = pd.DataFrame({
+        'ID': ids,
+        'TEMA': temas,
+        'LOCAL': np.array(LOCAIS, dtype=object)[rng.integers(0, len(LOCAIS), linhas)],
+        'TEMPO': np.datetime_as_string(datas),
+        'CATEGORIA': categorias,
+        'STATUS': np.array(STATUS, dtype=object)[rng.choice(len(STATUS), linhas, p=PESOS_STATUS)],
+        'DESCRICAO': descricoes,
+        'URL': _URL + pd.Series(ids).astype(str) + '/',
+        'ANO': ano,
+        'MES': mes,
+        'DIA': dia,
+        'DIA_DO_ANO': dia_do_ano,
+        'SEMANA_DO_ANO': semana_do_ano,
+        'DIA_DA_SEMANA': dia_da_semana,
+        'TRIMETRES': (mes - 1) // 3 + 1,
+        'CASOS': np.minimum(rng.geometric(0.55, linhas), 5),
+    })
+    return DF[COLUNAS]
+
+
+def gravar_csv(caminho, linhas, semente=0, bloco=250_000, **opcoes):
+    """Grava um CSV sintético de `linhas` reclamações, gerado em blocos.
+
+    Cada bloco usa uma semente derivada de `semente`, então o arquivo é o
+    mesmo a cada execução e a memória usada não cresce com `linhas`.
+    """
+    for numero, primeira in enumerate(range(0, linhas, bloco)):
+        DF = gerar(min(bloco, linhas - primeira), semente=(semente, numero), primeiro_id=primeira + 1, **opcoes)
+        DF.to_csv(caminho, index=False, mode='w' if numero == 0 else 'a', header=numero == 0)
+    return caminho
@@ -0,0 +1,79 @@
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from reclameaqui import busca, navegador
+from reclameaqui.cache import carregar_empresa, empresas, indice_busca, preparar_empresas, textos_empresa
+
+RESULTADOS_POR_PAGINA = 10
+TAMANHO_TRECHO = 300
+
+st.title('Busca nas Reclamações')
+
+EMPRESAS = empresas()
+# Empresas com cache desatualizado são preparadas em paralelo
+preparar_empresas(EMPRESAS.values())
+
+consulta = st.text_input(
+    "Buscar em título e descrição",
+    placeholder="Ex.: cancelar, reembolso, entrega (use cancel* para buscar por prefixo)"
+)
+
+# MENU LATERAL 
+with st.sidebar:
+    selecionadas = st.multiselect("Empresas", list(EMPRESAS), default=list(EMPRESAS))
+    DADOS = {codigo: carregar_empresa(EMPRESAS[codigo].caminho, busca.COLUNAS) for codigo in selecionadas}
+    opcoes_status = sorted({str(s) for DF in DADOS.values() for s in DF['STATUS'].dropna().unique()})
+    opcoes_locais = sorted({str(l) for DF in DADOS.values() for l in DF['LOCAL'].dropna().unique()})
+    status = st.multiselect("Status", opcoes_status)
+    locais = st.multiselect("Local", opcoes_locais)
+    datas = [DF['data'] for DF in DADOS.values() if len(DF)]
+    periodo = ()
+    if datas:
+        menor = min(d.min() for d in datas).date()
+        maior = max(d.max() for d in datas).date()
+        periodo = st.date_input("Período", value=(menor, maior), min_value=menor, max_value=maior)
+
+if not consulta.strip():
+    st.write("---")
+    st.write("Digite um termo para buscar nas reclamações das empresas selecionadas.")
+    st.stop()
+
+inicio_periodo, fim_periodo = (periodo + (None, None))[:2] if periodo else (None, None)
+
+comeco = time.perf_counter()
+encontrados = []
+for codigo, DF in DADOS.items():
+    mascara = busca.filtrar(DF, status, locais, inicio_periodo, fim_periodo)
+    documentos, pontuacoes = busca.buscar(indice_busca(EMPRESAS[codigo].caminho), consulta, mascara)
+    encontrados.append(pd.DataFrame({'empresa': codigo, 'linha': documentos, 'pontuacao': pontuacoes}))
+resultados = pd.concat(encontrados, ignore_index=True) if encontrados else pd.DataFrame(columns=['empresa', 'linha', 'pontuacao'])
+resultados = resultados.iloc[np.argsort(-resultados['pontuacao'].to_numpy(), kind='stable')]
+duracao = (time.perf_counter() - comeco) * 1000
+
+st.caption(f"{len(resultados)} reclamações encontradas em {duracao:.0f} ms.")
+if resultados.empty:
+    st.stop()
+
+paginas = -(-len(resultados) // RESULTADOS_POR_PAGINA)
+pagina = st.number_input("Página", min_value=1, max_value=paginas, value=1, step=1)
+st.write("---")
+exibidos = resultados.iloc[(pagina - 1) * RESULTADOS_POR_PAGINA:pagina * RESULTADOS_POR_PAGINA]
+# Descrição e URL são lidas do disco só para os resultados desta página
+TEXTOS = {
+    codigo: textos_empresa(EMPRESAS[codigo].caminho, grupo['linha'])
+    for codigo, grupo in exibidos.groupby('empresa')
+}
+for resultado in exibidos.itertuples():
+    linha = DADOS[resultado.empresa].iloc[resultado.linha]
+    textos = TEXTOS[resultado.empresa].loc[resultado.linha]
+    st.markdown(f"**[{navegador.escapar(linha['TEMA'])}]({textos['URL']})**")
+    st.caption(
+        f"{navegador.escapar(EMPRESAS[resultado.empresa].nome)} · {navegador.escapar(linha['STATUS'])} · "
+        f"{navegador.escapar(linha['LOCAL'])} · {linha['data']:%d/%m/%Y}"
+    )
+    st.markdown(navegador.escapar(navegador.trecho(textos['DESCRICAO'], TAMANHO_TRECHO)))
+    st.write("---")
+st.caption(f"Página {pagina} de {paginas}")
@@ -0,0 +1,32 @@
+import streamlit as st
+
+from reclameaqui import figuras
+from reclameaqui.cache import empresas, figuras_comparacao, preparar_empresas
+from reclameaqui.series import NOMES_FREQUENCIAS
+
+st.title('Comparação entre Empresas')
+
+EMPRESAS = empresas()
+# Empresas com cache desatualizado são preparadas em paralelo
+preparar_empresas(EMPRESAS.values())
+
+# Na comparação, os status são mostrados como proporção de cada empresa
+SUBTITULOS = {**figuras.SUBTITULOS, 'reclamacao_status': "Proporção de cada tipo de status."}
+
+# MENU LATERAL 
+with st.sidebar:
+    selecionadas = st.multiselect("Empresas", list(EMPRESAS), default=list(EMPRESAS))
+    frequencia = st.radio("Resolução da série temporal", list(NOMES_FREQUENCIAS), index=1,
+                          format_func=NOMES_FREQUENCIAS.get, horizontal=True)
+
+if len(selecionadas) < 2:
+    st.write("---")
+    st.write("Selecione ao menos duas empresas no menu ao lado")
+    st.write("---")
+    st.stop()
+
+figuras = figuras_comparacao([EMPRESAS[codigo] for codigo in selecionadas], frequencia)
+for chave, figura in figuras.items():
+    st.write("---")
+    st.subheader(SUBTITULOS[chave])
+    st.plotly_chart(figura)
@@ -0,0 +1,58 @@
+import streamlit as st
+
+from reclameaqui import navegador
+from reclameaqui.cache import carregar_empresa, empresas, ordem_reclamacoes, preparar_empresas, textos_empresa
+from reclameaqui.filtros import Filtro
+from reclameaqui.interface import filtro_lateral
+
+TAMANHOS_PAGINA = [10, 25, 50]
+TAMANHO_TRECHO = 300
+
+st.title('Reclamações')
+
+EMPRESAS = empresas()
+# Empresas com cache desatualizado são preparadas em paralelo
+preparar_empresas(EMPRESAS.values())
+
+# MENU LATERAL
+with st.sidebar:
+    seletor = st.selectbox("Selecione a Loja", ["--SELECIONE--", *EMPRESAS])
+    filtro = filtro_lateral(EMPRESAS[seletor]) if seletor in EMPRESAS else Filtro()
+    chave = st.selectbox("Ordenar por", list(navegador.ORDENACOES), format_func=navegador.ORDENACOES.get)
+    decrescente = st.toggle("Ordem decrescente", value=True)
+    tamanho = st.selectbox("Reclamações por página", TAMANHOS_PAGINA)
+
+if seletor not in EMPRESAS:
+    st.write("---")
+    st.write("Selecione uma loja no menu ao lado")
+    st.stop()
+
+caminho = EMPRESAS[seletor].caminho
+DF = carregar_empresa(caminho, navegador.COLUNAS)
+ordem = ordem_reclamacoes(caminho, filtro, chave, decrescente)
+
+st.caption(f"{len(ordem)} reclamações.")
+if not len(ordem):
+    st.stop()
+
+paginas = navegador.paginas(ordem, tamanho)
+# A página volta à primeira quando o filtro ou a ordenação mudam
+pagina = st.number_input("Página", min_value=1, max_value=paginas, value=1, step=1,
+                         key=f"pagina_{seletor}_{hash((filtro, chave, decrescente, tamanho))}")
+st.write("---")
+linhas = navegador.pagina(ordem, pagina, tamanho)
+# Descrição e URL são lidas do disco só para as reclamações desta página
+TEXTOS = textos_empresa(caminho, linhas)
+for posicao in linhas:
+    linha = DF.iloc[posicao]
+    textos = TEXTOS.loc[posicao]
+    descricao = textos['DESCRICAO'] if isinstance(textos['DESCRICAO'], str) else ''
+    trecho = navegador.trecho(descricao, TAMANHO_TRECHO)
+    st.markdown(f"**[{navegador.escapar(linha['TEMA'])}]({textos['URL']})**")
+    st.caption(f"{navegador.escapar(linha['STATUS'])} · {navegador.escapar(linha['LOCAL'])} · {linha['data']:%d/%m/%Y}")
+    # O texto completo só vai para o navegador quando pedido
+    if trecho != descricao and st.toggle("Texto completo", key=f"completo_{seletor}_{posicao}"):
+        trecho = descricao
+    st.markdown(navegador.escapar(trecho))
+    st.write("---")
+st.caption(f"Página {pagina} de {paginas}")
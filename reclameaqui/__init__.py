@@ -0,0 +1 @@
+"""Pipeline de dados do dashboard de reclamações do Reclame Aqui."""
@@ -0,0 +1,255 @@
+"""Repositório incremental de métricas agregadas por empresa.
+
+Para cada CSV são guardadas, em `.cache/agregados/<nome>.npz`, as contagens
+diárias, por STATUS, por LOCAL e o histograma do tamanho das descrições, além
+dos IDs já vistos, da posição (em bytes) até onde o arquivo foi lido e da
+versão (mtime e tamanho) do CSV lido. Quando o coletor acrescenta linhas ao
+CSV, só o trecho novo é lido e somado às contagens, descartando IDs
+repetidos. Se o trecho já lido mudar (CSV reescrito ou editado), o
+repositório é reconstruído do zero: o arquivo modificado sem mudar de
+tamanho, ou com outra assinatura do trecho lido (o final dele e amostras
+espalhadas por ele).
+
+O trecho novo é lido em blocos (`config.TAMANHO_BLOCO`), só com as colunas
+usadas nas contagens, então a memória não cresce com o tamanho do CSV; só os
+IDs vistos são mantidos para todas as linhas.
+"""
+import hashlib
+import io
+import os
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from reclameaqui import armazenamento, colunar, config, dados
+from reclameaqui.instrumentacao import medir
+
+# Largura, em caracteres, das classes do histograma de tamanho das descrições
+LARGURA_CLASSE_TAMANHO = 10
+
+# Colunas dos dados preparados que entram nos agregados
+COLUNAS = ('ID', 'data', 'STATUS', 'LOCAL', 'tamanho_descricao')
+
+# Colunas do CSV lidas para os agregados
+COLUNAS_CSV = ('ID', 'STATUS', 'LOCAL', 'DESCRICAO', 'ANO', 'MES', 'DIA')
+
+# Bytes de cada amostra do trecho já lido usados para reconhecer que o
+# arquivo só cresceu, e número de amostras além da do final
+_JANELA_ASSINATURA = 4096
+_AMOSTRAS_ASSINATURA = 16
+
+
+class Agregados(NamedTuple):
+    diario: pd.Series
+    status: pd.Series
+    estados: pd.Series
+    tamanhos: pd.Series
+    datas_invalidas: int = 0
+
+
+def _ordenar(contagem):
+    """Ordena da maior para a menor contagem, desempatando pelo rótulo."""
+    ordem = np.lexsort((contagem.index.to_numpy(dtype=str), -contagem.to_numpy()))
+    return contagem.iloc[ordem]
+
+
+def _contagem(serie):
+    """value_counts sem categorias vazias e com rótulos de texto simples."""
+    contagem = serie.value_counts()
+    contagem = contagem[contagem > 0]
+    return _ordenar(pd.Series(contagem.to_numpy(dtype='int64'), index=contagem.index.astype(str).to_numpy(dtype=object)))
+
+
+def agregar(DF):
+    """Calcula os agregados de um DataFrame preparado."""
+    if 'data' in DF.columns:
+        diario = DF.groupby('data').size().astype('int64')
+    else:
+        diario = pd.Series(dtype='int64', index=pd.DatetimeIndex([], name='data'))
+    classes = DF['tamanho_descricao'].to_numpy(dtype='int64') // LARGURA_CLASSE_TAMANHO
+    tamanhos = pd.Series(classes).value_counts().sort_index().astype('int64')
+    return Agregados(
+        diario=diario,
+        status=_contagem(DF['STATUS']),
+        estados=_contagem(DF['LOCAL']),
+        tamanhos=tamanhos,
+        datas_invalidas=DF.attrs.get('datas_invalidas', 0),
+    )
+
+
+def somar(a, b):
+    """Soma dois conjuntos de agregados de linhas distintas."""
+    def _somar(x, y):
+        return x.add(y, fill_value=0).astype('int64')
+
+    return Agregados(
+        diario=_somar(a.diario, b.diario).sort_index(),
+        status=_ordenar(_somar(a.status, b.status)),
+        estados=_ordenar(_somar(a.estados, b.estados)),
+        tamanhos=_somar(a.tamanhos, b.tamanhos).sort_index(),
+        datas_invalidas=a.datas_invalidas + b.datas_invalidas,
+    )
+
+
+def caminho_repositorio(caminho_csv):
+    """Caminho do repositório de agregados correspondente a um CSV."""
+    return colunar.DIRETORIO_CACHE / 'agregados' / (Path(caminho_csv).stem + '.npz')
+
+
+def _serie(rotulos, contagens):
+    return pd.Series(contagens.astype('int64'), index=rotulos)
+
+
+def _montar_repositorio(estado, arquivo):
+    agregados = Agregados(
+        diario=_serie(pd.DatetimeIndex(arquivo['diario_datas'], name='data'), arquivo['diario_contagens']),
+        status=_serie(arquivo['status_rotulos'].astype(object), arquivo['status_contagens']),
+        estados=_serie(arquivo['estados_rotulos'].astype(object), arquivo['estados_contagens']),
+        tamanhos=_serie(arquivo['tamanhos_classes'], arquivo['tamanhos_contagens']),
+        datas_invalidas=estado['datas_invalidas'],
+    )
+    return agregados, arquivo['ids'], estado
+
+
+def _gravar_repositorio(caminho, agregados, ids, estado):
+    armazenamento.gravar_npz(
+        caminho,
+        {**estado, 'datas_invalidas': agregados.datas_invalidas},
+        ids=ids,
+        diario_datas=agregados.diario.index.to_numpy(dtype='datetime64[ns]'),
+        diario_contagens=agregados.diario.to_numpy(),
+        status_rotulos=agregados.status.index.to_numpy(dtype=str),
+        status_contagens=agregados.status.to_numpy(),
+        estados_rotulos=agregados.estados.index.to_numpy(dtype=str),
+        estados_contagens=agregados.estados.to_numpy(),
+        tamanhos_classes=agregados.tamanhos.index.to_numpy(dtype='int64'),
+        tamanhos_contagens=agregados.tamanhos.to_numpy(),
+    )
+
+
+def em_dia(caminho_csv, repositorio=None):
+    """Se o repositório (por padrão, o de agregados do CSV) já consumiu o CSV até o fim."""
+    estado = armazenamento.ler_npz(repositorio or caminho_repositorio(caminho_csv), lambda estado, arquivo: estado)
+    return estado is not None and estado.get('versao') == list(dados.versao_arquivo(caminho_csv))
+
+
+def _assinatura(arquivo, posicao):
+    """Hash do final dos `posicao` primeiros bytes e de amostras espalhadas por eles."""
+    resumo = hashlib.blake2b(digest_size=16)
+    inicios = np.linspace(0, max(0, posicao - _JANELA_ASSINATURA), _AMOSTRAS_ASSINATURA).astype('int64')
+    for inicio in [*inicios, max(0, posicao - _JANELA_ASSINATURA)]:
+        arquivo.seek(int(inicio))
+        resumo.update(arquivo.read(min(_JANELA_ASSINATURA, posicao - int(inicio))))
+    return resumo.hexdigest()
+
+
+def _fim_linhas_completas(arquivo, inicio, tamanho, passo=1 << 16):
+    """Posição logo após a última quebra de linha entre `inicio` e `tamanho`."""
+    fim = tamanho
+    while fim > inicio:
+        comeco = max(inicio, fim - passo)
+        arquivo.seek(comeco)
+        quebra = arquivo.read(fim - comeco).rfind(b'\n')
+        if quebra >= 0:
+            return comeco + quebra + 1
+        fim = comeco
+    return inicio
+
+
+class _Trecho(io.RawIOBase):
+    """Os próximos `tamanho` bytes de `arquivo`, lidos como um arquivo à parte."""
+
+    def __init__(self, arquivo, tamanho):
+        self._arquivo = arquivo
+        self._restante = tamanho
+
+    def readable(self):
+        return True
+
+    def readinto(self, destino):
+        quantidade = min(len(destino), self._restante)
+        lidos = self._arquivo.readinto(memoryview(destino)[:quantidade]) if quantidade else 0
+        self._restante -= lidos
+        return lidos
+
+
+class Acrescimo:
+    """Linhas acrescentadas a um CSV desde o estado salvo por um repositório incremental.
+
+    O `estado` (cabeçalho, versão do CSV, posição e assinatura do trecho já
+    lido) e os `ids` vistos vêm do repositório; se o arquivo não for o mesmo
+    que só cresceu, `do_zero` é verdadeiro e a leitura recomeça do início.
+    Depois de consumir `blocos()`, `estado` e `ids` devem ser gravados de volta.
+    """
+
+    def __init__(self, caminho_csv, estado=None, ids=None, colunas_csv=COLUNAS_CSV):
+        self.caminho_csv = caminho_csv
+        with open(caminho_csv, 'rb') as arquivo:
+            info = os.fstat(arquivo.fileno())
+            versao = [info.st_mtime_ns, info.st_size]
+            self.cabecalho = arquivo.readline()
+            self.tamanho = info.st_size
+            self.inalterado = estado is not None and estado.get('versao') == versao
+            self.do_zero = not self.inalterado and (
+                estado is None
+                or 'versao' not in estado
+                or estado['cabecalho'] != self.cabecalho.decode('utf-8')
+                or estado['posicao'] > self.tamanho
+                # Modificado sem mudar de tamanho: não é um acréscimo
+                or estado['versao'][1] == self.tamanho
+                or estado['assinatura'] != _assinatura(arquivo, estado['posicao'])
+            )
+            self.posicao = len(self.cabecalho) if self.do_zero else estado['posicao']
+            self.ids = np.empty(0, dtype='int64') if self.do_zero else ids
+            fim = _fim_linhas_completas(arquivo, self.posicao, self.tamanho)
+            self.estado = {'cabecalho': self.cabecalho.decode('utf-8'), 'versao': versao, 'posicao': fim,
+                           'assinatura': _assinatura(arquivo, fim)}
+        self.colunas = pd.read_csv(io.BytesIO(self.cabecalho), nrows=0).columns
+        self.usadas = [coluna for coluna in colunas_csv if coluna in self.colunas]
+
+    def completo(self):
+        """Se não há nada além do que já foi lido."""
+        return self.inalterado or (not self.do_zero and self.posicao == self.tamanho)
+
+    def vazio(self):
+        """DataFrame preparado sem linhas, com os tipos certos, a partir do cabeçalho."""
+        return dados.preparar_dados(pd.read_csv(io.BytesIO(self.cabecalho), dtype=dados.ESQUEMA, usecols=self.usadas))
+
+    def blocos(self, tamanho_bloco=config.TAMANHO_BLOCO):
+        """Blocos preparados das linhas novas, sem IDs já vistos.
+
+        Só linhas completas (terminadas em quebra de linha) são consumidas; uma
+        linha ainda sendo escrita pelo coletor fica para a próxima atualização.
+        """
+        fim = self.estado['posicao']
+        if fim <= self.posicao:
+            return
+        with open(self.caminho_csv, 'rb') as arquivo:
+            arquivo.seek(self.posicao)
+            with io.BufferedReader(_Trecho(arquivo, fim - self.posicao)) as trecho:
+                for DF in dados.ler_em_blocos(trecho, tamanho_bloco, self.usadas, header=None, names=self.colunas):
+                    DF, self.ids = dados.descartar_repetidos(DF, self.ids)
+                    yield dados.preparar_dados(DF)
+
+
+def atualizar(caminho_csv, tamanho_bloco=config.TAMANHO_BLOCO):
+    """Devolve os agregados do CSV, lendo só as linhas acrescentadas desde a última vez."""
+    destino = caminho_repositorio(caminho_csv)
+    agregados, ids, estado = armazenamento.ler_npz(destino, _montar_repositorio) or (None, None, None)
+    acrescimo = Acrescimo(caminho_csv, estado, ids)
+    if acrescimo.completo():
+        return agregados
+    if acrescimo.do_zero:
+        # Agregados vazios, com os tipos certos, para um arquivo só com o cabeçalho
+        agregados = agregar(acrescimo.vazio())
+
+    with medir('ingestao') as medicao:
+        medicao['linhas'] = 0
+        for DF in acrescimo.blocos(tamanho_bloco):
+            medicao['linhas'] += len(DF)
+            agregados = somar(agregados, agregar(DF))
+
+    _gravar_repositorio(destino, agregados, acrescimo.ids, acrescimo.estado)
+    return agregados
@@ -0,0 +1,139 @@
+"""Detecção de dias atípicos no volume diário de reclamações.
+
+As séries diárias das empresas são alinhadas em uma matriz dias x empresas,
+com zero nos dias sem reclamações e NaN fora do período de cada empresa. A
+referência de cada dia é a mediana das observações anteriores, e a escala é
+o MAD (desvio absoluto mediano) delas:
+
+- 'mediana': os `janela` dias anteriores;
+- 'semanal': o mesmo dia da semana nas `janela` semanas anteriores. Na
+  matriz diária completa, o mesmo DIA_DA_SEMANA (segunda = 0) se repete a
+  cada 7 linhas, então basta tomar uma observação a cada 7.
+
+As janelas são visões da matriz (`sliding_window_view`), e todas as empresas
+são calculadas de uma vez. Um dia é atípico quando a pontuação robusta
+`(reclamações - mediana) / (1,4826 * MAD)` passa de `LIMIAR`. Como a
+referência de um dia só depende dos dias anteriores, `atualizar` recalcula só
+a partir do primeiro dia que mudou desde a detecção anterior.
+"""
+import warnings
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Passo entre as observações da janela e tamanho da janela de cada método
+METODOS = {'mediana': (1, 28), 'semanal': (7, 8)}
+
+# Pontuação robusta a partir da qual um dia é atípico
+LIMIAR = 3.5
+
+# Escala mínima, em reclamações: sem ela, uma série quase constante (MAD
+# zero) faria de qualquer dia diferente da mediana um dia atípico
+ESCALA_MINIMA = 1.0
+
+# Fator que torna o MAD comparável ao desvio padrão de uma normal
+_FATOR_MAD = 1.4826
+
+NOMES_DIAS = ('seg', 'ter', 'qua', 'qui', 'sex', 'sáb', 'dom')
+
+
+class Deteccao(NamedTuple):
+    metodo: str
+    empresas: tuple
+    datas: pd.DatetimeIndex
+    contagens: np.ndarray
+    esperado: np.ndarray
+    escala: np.ndarray
+    pontuacao: np.ndarray
+
+    @property
+    def atipicos(self):
+        return self.pontuacao > LIMIAR
+
+
+def matriz_diaria(diarios):
+    """Datas e matriz dias x empresas das séries diárias em `diarios` (empresa -> série).
+
+    Os dias sem reclamações dentro do período de cada empresa valem zero; os
+    de fora, NaN.
+    """
+    series = [diario for diario in diarios.values() if len(diario)]
+    if not series:
+        return pd.DatetimeIndex([], name='data'), np.empty((0, len(diarios)))
+    datas = pd.date_range(min(s.index.min() for s in series), max(s.index.max() for s in series), freq='D', name='data')
+    contagens = np.full((len(datas), len(diarios)), np.nan)
+    for coluna, diario in enumerate(diarios.values()):
+        if len(diario):
+            primeira, ultima = datas.get_indexer([diario.index.min(), diario.index.max()])
+            contagens[primeira:ultima + 1, coluna] = 0
+            contagens[datas.get_indexer(diario.index), coluna] = diario.to_numpy()
+    return datas, contagens
+
+
+def referencia(contagens, passo, janela, inicio=0):
+    """Mediana e escala robusta de cada dia a partir de `inicio`, pelas `janela` observações anteriores.
+
+    As observações ficam a `passo` dias umas das outras. Com menos de
+    `janela // 2` observações, a mediana é NaN.
+    """
+    extensao = passo * janela
+    if inicio >= len(contagens):
+        vazia = np.empty((0, contagens.shape[1]))
+        return vazia, vazia
+    preenchida = np.vstack([np.full((extensao, contagens.shape[1]), np.nan), contagens])
+    # A janela do dia t são as linhas t - extensao .. t - 1 da matriz original
+    janelas = sliding_window_view(preenchida[inicio:len(contagens) - 1 + extensao], extensao, axis=0)[..., ::passo]
+    with warnings.catch_warnings():
+        # Janelas só com NaN (antes do início de uma empresa) dão NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mediana = np.nanmedian(janelas, axis=-1)
+        mad = np.nanmedian(np.abs(janelas - mediana[..., None]), axis=-1)
+    mediana[(~np.isnan(janelas)).sum(axis=-1) < janela // 2] = np.nan
+    return mediana, np.maximum(_FATOR_MAD * mad, ESCALA_MINIMA)
+
+
+def _primeira_diferenca(anterior, contagens):
+    """Primeira linha em que as contagens diferem das da detecção anterior."""
+    comum = min(len(anterior), len(contagens))
+    iguais = (anterior[:comum] == contagens[:comum]) | (np.isnan(anterior[:comum]) & np.isnan(contagens[:comum]))
+    diferentes = np.flatnonzero(~iguais.all(axis=1))
+    return int(diferentes[0]) if len(diferentes) else comum
+
+
+def atualizar(anterior, diarios, metodo='semanal'):
+    """Detecção sobre as séries de `diarios`, aproveitando os dias inalterados de `anterior`.
+
+    `anterior` é a `Deteccao` devolvida na chamada anterior, ou None. Ela só
+    é aproveitada se o método, as empresas e o primeiro dia forem os mesmos.
+    """
+    passo, janela = METODOS[metodo]
+    empresas = tuple(diarios)
+    datas, contagens = matriz_diaria(diarios)
+    inicio = 0
+    if (anterior is not None and anterior.metodo == metodo and anterior.empresas == empresas
+            and len(anterior.datas) and len(datas) and anterior.datas[0] == datas[0]):
+        inicio = _primeira_diferenca(anterior.contagens, contagens)
+
+    mediana, escala = referencia(contagens, passo, janela, inicio)
+    if inicio:
+        mediana = np.vstack([anterior.esperado[:inicio], mediana])
+        escala = np.vstack([anterior.escala[:inicio], escala])
+    with np.errstate(invalid='ignore'):
+        pontuacao = (contagens - mediana) / escala
+    return Deteccao(metodo, empresas, datas, contagens, mediana, escala, pontuacao)
+
+
+def alertas(deteccao, empresa):
+    """Dias atípicos de `empresa`, do mais recente ao mais antigo."""
+    coluna = deteccao.empresas.index(empresa)
+    dias = np.flatnonzero(deteccao.atipicos[:, coluna])[::-1]
+    datas = deteccao.datas[dias]
+    return pd.DataFrame({
+        'data': datas,
+        'dia_semana': [NOMES_DIAS[dia] for dia in datas.dayofweek],
+        'reclamacoes': deteccao.contagens[dias, coluna].astype('int64'),
+        'esperado': deteccao.esperado[dias, coluna].round(1),
+        'pontuacao': deteccao.pontuacao[dias, coluna].round(1),
+    })
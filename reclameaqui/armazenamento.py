@@ -0,0 +1,49 @@
+"""Gravação atômica dos arquivos em disco e repositórios `.npz`.
+
+Cada arquivo é gravado em um temporário ao lado do destino e trocado de uma
+vez com `os.replace`, para que outro processo nunca leia um arquivo pela
+metade. Os repositórios `.npz` (agregados, termos) guardam arrays NumPy e um
+estado em JSON.
+"""
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+
+@contextmanager
+def gravacao_atomica(destino):
+    """Caminho temporário a gravar no lugar de `destino`, que é substituído no fim do bloco.
+
+    O temporário mantém a extensão do destino (o `np.savez` acrescentaria
+    `.npz`) e é removido se o bloco falhar.
+    """
+    destino = Path(destino)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_name(f'{destino.stem}.{os.getpid()}.tmp{destino.suffix}')
+    try:
+        yield temporario
+        os.replace(temporario, destino)
+    finally:
+        temporario.unlink(missing_ok=True)
+
+
+def ler_npz(caminho, montar):
+    """Resultado de `montar(estado, arquivo)` para o repositório em `caminho`.
+
+    Devolve None se o repositório não existe, está corrompido ou não tem os
+    arrays que `montar` lê.
+    """
+    try:
+        with np.load(caminho, allow_pickle=False) as arquivo:
+            return montar(json.loads(str(arquivo['estado'])), arquivo)
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
+
+
+def gravar_npz(caminho, estado, **arrays):
+    """Grava atomicamente o `estado` (em JSON) e os `arrays` no repositório em `caminho`."""
+    with gravacao_atomica(caminho) as temporario:
+        np.savez(temporario, estado=np.array(json.dumps(estado)), **arrays)
@@ -0,0 +1,226 @@
+"""Backend opcional em um banco analítico embutido (SQLite ou DuckDB).
+
+Com `config.BACKEND` igual a 'sqlite' ou 'duckdb', as colunas usadas pelos
+gráficos de cada empresa são copiadas do Parquet para um banco local em
+`.cache/`, uma vez por versão do CSV, e cada gráfico vira uma consulta
+agregada: só as contagens chegam ao Python, e os DataFrames das empresas não
+ficam em memória. O DuckDB é opcional (`pip install duckdb`); sem ele, ou com
+'pandas', o dashboard agrega os DataFrames como antes.
+"""
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from reclameaqui import colunar, config, dados
+from reclameaqui.agregados import LARGURA_CLASSE_TAMANHO, Agregados
+from reclameaqui.filtros import Filtro, OpcoesFiltro
+from reclameaqui.instrumentacao import medir
+
+logger = logging.getLogger(__name__)
+
+# Colunas dos dados preparados copiadas para o banco
+COLUNAS = ('data', 'STATUS', 'LOCAL', 'tamanho_descricao')
+
+# Número de estados devolvidos pela consulta de LOCAL (o gráfico mostra os 10 maiores)
+TOP_ESTADOS = 10
+
+_ESQUEMA = (
+    'CREATE TABLE IF NOT EXISTS reclamacoes '
+    '(empresa TEXT, dia INTEGER, status TEXT, local TEXT, classe_tamanho INTEGER)',
+    'CREATE INDEX IF NOT EXISTS reclamacoes_empresa ON reclamacoes (empresa, dia)',
+    'CREATE TABLE IF NOT EXISTS versoes (empresa TEXT PRIMARY KEY, versao TEXT, datas_invalidas INTEGER)',
+)
+
+
+class Motor(NamedTuple):
+    nome: str
+    conectar: object
+    inserir: object
+    erros: tuple
+
+
+def _conectar_sqlite(caminho):
+    # Sem transações implícitas: a carga abre e fecha a sua
+    return sqlite3.connect(caminho, check_same_thread=False, isolation_level=None)
+
+
+def _inserir_sqlite(conexao, DF):
+    linhas = zip(*(DF[coluna].tolist() for coluna in DF.columns))
+    conexao.executemany('INSERT INTO reclamacoes VALUES (?, ?, ?, ?, ?)', linhas)
+
+
+def _inserir_duckdb(conexao, DF):
+    conexao.register('lote', DF)
+    try:
+        conexao.execute('INSERT INTO reclamacoes SELECT * FROM lote')
+    finally:
+        conexao.unregister('lote')
+
+
+def motor(nome=config.BACKEND):
+    """O motor do backend `nome`, ou None para agregar com o pandas."""
+    if nome == 'sqlite':
+        return Motor('sqlite', _conectar_sqlite, _inserir_sqlite, (sqlite3.Error,))
+    if nome == 'duckdb':
+        try:
+            import duckdb
+        except ImportError:
+            logger.warning("O DuckDB não está instalado; os gráficos serão agregados com o pandas.")
+            return None
+        return Motor('duckdb', duckdb.connect, _inserir_duckdb, (duckdb.Error,))
+    if nome != 'pandas':
+        logger.warning("Backend %r desconhecido; os gráficos serão agregados com o pandas.", nome)
+    return None
+
+
+MOTOR = motor()
+
+# Uma conexão por motor no processo, usada por uma thread de cada vez
+_trava = threading.Lock()
+_conexoes = {}
+
+
+def caminho_banco(motor):
+    """Arquivo do banco de um motor."""
+    return colunar.DIRETORIO_CACHE / f'reclameaqui.{motor.nome}'
+
+
+def _conexao(motor):
+    if motor.nome not in _conexoes:
+        caminho = caminho_banco(motor)
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        conexao = motor.conectar(str(caminho))
+        for comando in _ESQUEMA:
+            conexao.execute(comando)
+        _conexoes[motor.nome] = conexao
+    return _conexoes[motor.nome]
+
+
+def _lote(empresa, DF):
+    """Linhas da tabela `reclamacoes` a partir de um lote do Parquet."""
+    def _texto(serie):
+        return serie.astype(object).where(serie.notna(), None)
+
+    return pd.DataFrame({
+        'empresa': empresa,
+        'dia': DF['data'].to_numpy(dtype='datetime64[D]').astype('int64'),
+        'status': _texto(DF['STATUS']),
+        'local': _texto(DF['LOCAL']),
+        'classe_tamanho': DF['tamanho_descricao'].to_numpy(dtype='int64') // LARGURA_CLASSE_TAMANHO,
+    })
+
+
+def _carregar(conexao, motor, caminho_csv):
+    """Copia a empresa para o banco se a versão do CSV mudou; devolve a chave e as datas inválidas."""
+    empresa = str(Path(caminho_csv).resolve())
+    versao = json.dumps(list(dados.versao_arquivo(caminho_csv)))
+    atual = conexao.execute('SELECT versao, datas_invalidas FROM versoes WHERE empresa = ?', [empresa]).fetchone()
+    if atual is not None and atual[0] == versao:
+        return empresa, atual[1]
+
+    with medir('carga_banco', empresa=Path(caminho_csv).stem) as medicao:
+        datas_invalidas = colunar.datas_invalidas(caminho_csv)
+        conexao.execute('BEGIN TRANSACTION')
+        try:
+            conexao.execute('DELETE FROM reclamacoes WHERE empresa = ?', [empresa])
+            medicao['linhas'] = 0
+            for DF in colunar.ler_em_lotes(caminho_csv, list(COLUNAS)):
+                motor.inserir(conexao, _lote(empresa, DF))
+                medicao['linhas'] += len(DF)
+            conexao.execute('DELETE FROM versoes WHERE empresa = ?', [empresa])
+            conexao.execute('INSERT INTO versoes VALUES (?, ?, ?)', [empresa, versao, datas_invalidas])
+            conexao.execute('COMMIT')
+        except BaseException:
+            conexao.execute('ROLLBACK')
+            raise
+    return empresa, datas_invalidas
+
+
+def _dia(data):
+    return int(np.datetime64(pd.Timestamp(data), 'D').astype('int64'))
+
+
+def _condicoes(empresa, filtro):
+    """Cláusula WHERE e parâmetros equivalentes a `filtros.selecionar`."""
+    clausulas, parametros = ['empresa = ?'], [empresa]
+    if filtro.inicio is not None:
+        clausulas.append('dia >= ?')
+        parametros.append(_dia(filtro.inicio))
+    if filtro.fim is not None:
+        clausulas.append('dia <= ?')
+        parametros.append(_dia(filtro.fim))
+    for coluna, valores in (('status', filtro.status), ('local', filtro.locais)):
+        if valores:
+            clausulas.append(f"{coluna} IN ({', '.join('?' * len(valores))})")
+            parametros.extend(valores)
+    return ' AND '.join(clausulas), parametros
+
+
+def _contagem(linhas):
+    rotulos, contagens = zip(*linhas) if linhas else ((), ())
+    return pd.Series(np.array(contagens, dtype='int64'), index=np.array(rotulos, dtype=object))
+
+
+def agregados(caminho_csv, filtro=Filtro(), motor=MOTOR):
+    """Agregados dos gráficos da empresa, calculados por consultas no banco.
+
+    Iguais aos de `reclameaqui.agregados`, exceto por `estados`, que traz só
+    os `TOP_ESTADOS` maiores.
+    """
+    with _trava:
+        conexao = _conexao(motor)
+        empresa, datas_invalidas = _carregar(conexao, motor, caminho_csv)
+        onde, parametros = _condicoes(empresa, filtro)
+
+        def consultar(sql):
+            return conexao.execute(sql.format(onde=onde), parametros).fetchall()
+
+        with medir('consulta_banco', empresa=Path(caminho_csv).stem):
+            diario = consultar('SELECT dia, COUNT(*) FROM reclamacoes WHERE {onde} GROUP BY dia ORDER BY dia')
+            status = consultar(
+                'SELECT status, COUNT(*) AS n FROM reclamacoes WHERE {onde} AND status IS NOT NULL '
+                'GROUP BY status ORDER BY n DESC, status'
+            )
+            estados = consultar(
+                'SELECT local, COUNT(*) AS n FROM reclamacoes WHERE {onde} AND local IS NOT NULL '
+                f'GROUP BY local ORDER BY n DESC, local LIMIT {TOP_ESTADOS}'
+            )
+            tamanhos = consultar(
+                'SELECT classe_tamanho, COUNT(*) FROM reclamacoes WHERE {onde} '
+                'GROUP BY classe_tamanho ORDER BY classe_tamanho'
+            )
+
+    dias, contagens = zip(*diario) if diario else ((), ())
+    classes, frequencias = zip(*tamanhos) if tamanhos else ((), ())
+    return Agregados(
+        diario=pd.Series(np.array(contagens, dtype='int64'), index=pd.DatetimeIndex(
+            np.array(dias, dtype='int64').astype('datetime64[D]').astype('datetime64[ns]'), name='data')),
+        status=_contagem(status),
+        estados=_contagem(estados),
+        tamanhos=pd.Series(np.array(frequencias, dtype='int64'), index=np.array(classes, dtype='int64')),
+        datas_invalidas=datas_invalidas,
+    )
+
+
+def opcoes_filtro(caminho_csv, motor=MOTOR):
+    """Período e valores de STATUS e LOCAL da empresa, consultados no banco."""
+    with _trava:
+        conexao = _conexao(motor)
+        empresa, _ = _carregar(conexao, motor, caminho_csv)
+        inicio, fim = conexao.execute('SELECT MIN(dia), MAX(dia) FROM reclamacoes WHERE empresa = ?',
+                                      [empresa]).fetchone()
+        valores = {
+            coluna: [valor for (valor,) in conexao.execute(
+                f'SELECT DISTINCT {coluna} FROM reclamacoes WHERE empresa = ? AND {coluna} IS NOT NULL '
+                f'ORDER BY {coluna}', [empresa]).fetchall()]
+            for coluna in ('status', 'local')
+        }
+    if inicio is not None:
+        inicio, fim = (np.datetime64(int(dia), 'D').item() for dia in (inicio, fim))
+    return OpcoesFiltro(inicio, fim, valores['status'], valores['local'])
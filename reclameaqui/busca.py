@@ -0,0 +1,166 @@
+"""Busca textual nas reclamações com um índice invertido.
+
+O índice é montado uma vez por versão dos dados, a partir de TEMA e
+DESCRICAO. O texto é normalizado sem acentos e em minúsculas, as stopwords
+do português são removidas e os plurais reduzidos ao singular ("reembolsos"
+e "reembolso" são o mesmo termo). As postagens ficam em vetores NumPy no
+formato CSR, e as consultas são ranqueadas por BM25. Um termo terminado em
+`*` busca por prefixo: `cancel*` encontra "cancelar" e "cancelamento".
+"""
+import re
+from bisect import bisect_left
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+STOPWORDS = frozenset("""
+a ao aos aquela aquelas aquele aqueles aquilo as ate com como da das de dela
+delas dele deles depois do dos e ela elas ele eles em entre era eram essa
+essas esse esses esta estas este estes estava estavam estou eu foi fomos for
+foram fosse ha isso isto ja la lhe lhes mais mas me mesmo meu meus minha
+minhas muito na nao nas nem no nos nossa nossas nosso nossos num numa o os
+ou para pela pelas pelo pelos por qual quando que quem se sem ser seu seus
+so sua suas tambem te tem tenho ter teu tua um uma umas uns voce voces vos
+foi sao seja sido tinha estao esta pois entao ainda apos dia dias
+""".split())
+
+# Redução de plurais (passo de plural do RSLP, sobre o texto sem acentos)
+_PLURAIS = (('oes', 'ao'), ('aes', 'ao'), ('ais', 'al'), ('eis', 'el'), ('ois', 'ol'), ('ns', 'm'), ('res', 'r'), ('s', ''))
+_SEM_PLURAL = frozenset('atras depois gas lapis mes pais pires simples tenis tres'.split())
+
+_PALAVRA = r'[a-z0-9]+'
+
+# Colunas mantidas em memória para filtrar e exibir os resultados
+COLUNAS = ('data', 'STATUS', 'LOCAL', 'TEMA')
+
+# Colunas indexadas; a DESCRICAO só é lida para montar o índice
+COLUNAS_INDICE = ('TEMA', 'DESCRICAO')
+
+# Textos longos, lidos só para os resultados exibidos
+COLUNAS_TEXTO = ('DESCRICAO', 'URL')
+
+# Peso de uma ocorrência no TEMA em relação a uma na DESCRICAO
+PESO_TEMA = 2
+
+
+class Indice(NamedTuple):
+    vocabulario: list
+    inicio: np.ndarray
+    documentos: np.ndarray
+    frequencias: np.ndarray
+    comprimentos: np.ndarray
+
+
+def normalizar(textos):
+    """Minúsculas e sem acentos, de forma vetorizada sobre uma Series de textos."""
+    return (
+        textos.fillna('').astype('string')
+        .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii').str.lower()
+    )
+
+
+def radical(termo):
+    """Forma singular de um termo normalizado."""
+    if len(termo) <= 3 or termo in _SEM_PLURAL or termo.endswith(('ss', 'us')):
+        return termo
+    for sufixo, troca in _PLURAIS:
+        if termo.endswith(sufixo):
+            return termo[:-len(sufixo)] + troca
+    return termo
+
+
+def extrair_termos(textos):
+    """Termos de cada texto, como uma Series indexada pela posição do documento."""
+    termos = normalizar(textos).str.findall(_PALAVRA).explode().dropna()
+    termos = termos[(termos.str.len() > 1) & ~termos.isin(STOPWORDS)]
+    # O radical é calculado uma vez por palavra distinta, não por ocorrência
+    unicos = termos.unique()
+    return termos.map(dict(zip(unicos, map(radical, unicos))))
+
+
+def construir_indice(DF):
+    """Monta o índice invertido das colunas TEMA e DESCRICAO de `DF`."""
+    partes = [extrair_termos(DF['DESCRICAO'].reset_index(drop=True))]
+    tema = extrair_termos(DF['TEMA'].reset_index(drop=True))
+    partes.extend([tema] * PESO_TEMA)
+    termos = pd.concat(partes)
+
+    codigos, vocabulario = pd.factorize(termos, sort=True)
+    documentos = termos.index.to_numpy(dtype='int64')
+    chave = codigos.astype('int64') * len(DF) + documentos
+    chave, frequencias = np.unique(chave, return_counts=True)
+    codigos, documentos = np.divmod(chave, len(DF))
+
+    inicio = np.searchsorted(codigos, np.arange(len(vocabulario) + 1))
+    comprimentos = np.bincount(documentos, weights=frequencias, minlength=len(DF))
+    return Indice(
+        vocabulario=list(vocabulario),
+        inicio=inicio,
+        documentos=documentos.astype('int32'),
+        frequencias=frequencias.astype('int32'),
+        comprimentos=comprimentos.astype('float32'),
+    )
+
+
+def _expandir(indice, termo):
+    """Posições no vocabulário que correspondem a um termo da consulta."""
+    if termo.endswith('*'):
+        prefixo = termo[:-1]
+        posicao = bisect_left(indice.vocabulario, prefixo)
+        fim = posicao
+        while fim < len(indice.vocabulario) and indice.vocabulario[fim].startswith(prefixo):
+            fim += 1
+        return range(posicao, fim)
+    termo = radical(termo)
+    posicao = bisect_left(indice.vocabulario, termo)
+    if posicao < len(indice.vocabulario) and indice.vocabulario[posicao] == termo:
+        return range(posicao, posicao + 1)
+    return range(0)
+
+
+def termos_consulta(consulta):
+    """Termos de uma consulta, preservando o `*` de busca por prefixo."""
+    normalizada = normalizar(pd.Series([consulta]))[0]
+    return [
+        termo for termo in re.findall(_PALAVRA + r'\*?', normalizada)
+        if termo.rstrip('*') not in STOPWORDS and len(termo.rstrip('*')) > 1
+    ]
+
+
+def buscar(indice, consulta, mascara=None, k1=1.2, b=0.75):
+    """Documentos que casam com a consulta, do mais ao menos relevante.
+
+    `mascara`, se dada, é um vetor booleano com os documentos permitidos pelos
+    filtros. Devolve `(documentos, pontuacoes)`.
+    """
+    total = len(indice.comprimentos)
+    pontuacoes = np.zeros(total, dtype='float32')
+    media = indice.comprimentos.mean() if total else 0
+    for termo in termos_consulta(consulta):
+        for posicao in _expandir(indice, termo):
+            fatia = slice(indice.inicio[posicao], indice.inicio[posicao + 1])
+            documentos = indice.documentos[fatia]
+            frequencias = indice.frequencias[fatia]
+            idf = np.log1p((total - len(documentos) + 0.5) / (len(documentos) + 0.5))
+            normalizacao = k1 * (1 - b + b * indice.comprimentos[documentos] / media)
+            pontuacoes[documentos] += idf * frequencias * (k1 + 1) / (frequencias + normalizacao)
+    if mascara is not None:
+        pontuacoes[~mascara] = 0
+    documentos = np.flatnonzero(pontuacoes)
+    documentos = documentos[np.argsort(-pontuacoes[documentos], kind='stable')]
+    return documentos, pontuacoes[documentos]
+
+
+def filtrar(DF, status=None, locais=None, inicio=None, fim=None):
+    """Máscara booleana das linhas de `DF` que passam pelos filtros dados."""
+    mascara = np.ones(len(DF), dtype=bool)
+    if status:
+        mascara &= DF['STATUS'].isin(status).to_numpy()
+    if locais:
+        mascara &= DF['LOCAL'].isin(locais).to_numpy()
+    if inicio is not None:
+        mascara &= (DF['data'] >= pd.Timestamp(inicio)).to_numpy()
+    if fim is not None:
+        mascara &= (DF['data'] < pd.Timestamp(fim) + pd.Timedelta(days=1)).to_numpy()
+    return mascara
@@ -0,0 +1,476 @@
+"""Cache dos dados e gráficos compartilhado entre as sessões do Streamlit.
+
+Os DataFrames e figuras ficam em `st.cache_resource`, ou seja, uma única
+cópia em memória serve todas as sessões; por isso devem ser tratados como
+somente leitura. A chave inclui a versão do CSV (mtime e tamanho), então uma
+alteração no arquivo invalida as entradas automaticamente, e as entradas da
+versão anterior são descartadas.
+
+Os gráficos ficam à parte, já montados (`reclameaqui.prontas`), em um cache
+LRU com limite de memória: numa nova execução do script eles vão para o
+`st.plotly_chart` sem montar as figuras do plotly de novo.
+
+Com um backend SQL configurado (`reclameaqui.banco`), os agregados dos
+gráficos e as opções de filtro vêm de consultas no banco; se o banco falhar,
+o caminho do pandas é usado.
+"""
+import logging
+import threading
+from collections import OrderedDict, defaultdict
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from reclameaqui import (agregados, anomalias, banco, busca, categorias, colunar, comparacao, config, dados, figuras,
+                         filtros, inicializacao, navegador, paralelo, prontas, registro, termos)
+from reclameaqui.instrumentacao import em_cache, medir, tamanho_bytes
+
+logger = logging.getLogger(__name__)
+
+_trava = threading.Lock()
+_versoes_carregadas = {}
+# Chamadas em cache que dependem de cada arquivo, para limpar as entradas de
+# uma versão antiga sem afetar as demais empresas
+_chamadas = defaultdict(set)
+# Agregados calculados pelo preparo em paralelo, por (caminho, versão), ainda
+# não entregues ao cache de `_agregados`
+_preparados = {}
+# Memória de cada resultado em cache, medida quando ele é calculado, em
+# ordem de uso: função -> {argumentos: (caminhos, bytes)}
+_tamanhos = defaultdict(OrderedDict)
+# Limite de entradas das funções em cache que têm um (`_cache_limitado`)
+_limites = {}
+# Última detecção de dias atípicos de cada método, base da atualização
+# incremental da próxima
+_deteccoes = {}
+# JSON dos gráficos por (caminho, versão, gráfico, filtro, opção de exibição)
+_prontas = prontas.CacheFiguras(config.LIMITE_FIGURAS_MB * 1024 * 1024)
+
+
+def _registrar(caminhos, funcao, *argumentos):
+    with _trava:
+        for caminho in caminhos:
+            _chamadas[caminho].add((funcao, argumentos))
+    # A chamada conta como acerto até o corpo da função executar (`em_cache`)
+    empresa = '+'.join(Path(caminho).stem for caminho in caminhos)
+    with medir(funcao.__name__.lstrip('_'), empresa=empresa) as medicao:
+        medicao['cache'] = 'acerto'
+        resultado = funcao(*argumentos)
+    tamanho = tamanho_bytes(resultado) if medicao['cache'] == 'falta' else None
+    with _trava:
+        entradas = _tamanhos[funcao]
+        if tamanho is not None:
+            # O corpo executou, então o resultado acabou de entrar no cache
+            entradas[argumentos] = (tuple(caminhos), tamanho)
+        if argumentos in entradas:
+            entradas.move_to_end(argumentos)
+        # Acompanha o descarte do menos usado dos caches com limite de entradas
+        while len(entradas) > _limites.get(funcao, len(entradas)):
+            descartados, (caminhos_descartados, _) = entradas.popitem(last=False)
+            for caminho in caminhos_descartados:
+                _chamadas[caminho].discard((funcao, descartados))
+    return resultado
+
+
+def _cache_limitado(max_entries, **opcoes):
+    """`st.cache_resource` com no máximo `max_entries` entradas, registradas na contagem de memória."""
+    def decorador(funcao):
+        cacheada = st.cache_resource(max_entries=max_entries, **opcoes)(funcao)
+        _limites[cacheada] = max_entries
+        return cacheada
+    return decorador
+
+
+def _total(resultado):
+    return int(resultado.diario.sum())
+
+
+def _chamar(funcao, caminho, versao, *argumentos):
+    return _registrar([caminho], funcao, caminho, versao, *argumentos)
+
+
+@st.cache_resource(show_spinner="Carregando dados...")
+@em_cache(linhas=len)
+def _carregar(caminho, versao, colunas):
+    return colunar.ler_colunas(caminho, colunas)
+
+
+@st.cache_resource(show_spinner="Atualizando métricas...")
+@em_cache(linhas=_total)
+def _agregados(caminho, versao):
+    with _trava:
+        preparado = _preparados.pop((caminho, versao), None)
+    return preparado if preparado is not None else agregados.atualizar(caminho)
+
+
+@st.cache_resource(show_spinner="Indexando filtros...")
+@em_cache(linhas=lambda indice: len(indice.datas))
+def _indice_filtros(caminho, versao):
+    return filtros.construir_indices(_chamar(_carregar, caminho, versao, filtros.COLUNAS))
+
+
+def _linhas_filtradas(caminho, versao, filtro):
+    DF = _chamar(_carregar, caminho, versao, filtros.COLUNAS)
+    return DF.iloc[filtros.selecionar(_chamar(_indice_filtros, caminho, versao), filtro)]
+
+
+@_cache_limitado(64, show_spinner="Aplicando filtros...")
+@em_cache(linhas=_total)
+def _agregados_filtrados(caminho, versao, filtro):
+    return agregados.agregar(_linhas_filtradas(caminho, versao, filtro))
+
+
+@_cache_limitado(128, show_spinner="Consultando o banco...")
+@em_cache(linhas=_total)
+def _agregados_banco(caminho, versao, filtro):
+    return banco.agregados(caminho, filtro)
+
+
+@st.cache_resource(show_spinner="Consultando o banco...")
+@em_cache()
+def _opcoes_banco(caminho, versao):
+    return banco.opcoes_filtro(caminho)
+
+
+def _pelo_banco(funcao, caminho, versao, *argumentos):
+    """Resultado de `funcao` pelo banco, ou None sem backend SQL ou se o banco falhar."""
+    if banco.MOTOR is None:
+        return None
+    try:
+        return _chamar(funcao, caminho, versao, *argumentos)
+    except banco.MOTOR.erros:
+        logger.exception("Falha no banco %s; usando o pandas.", banco.MOTOR.nome)
+        return None
+
+
+def _base(caminho, versao, filtro):
+    """Agregados dos gráficos: do banco, do repositório (sem filtro) ou das linhas filtradas."""
+    base = _pelo_banco(_agregados_banco, caminho, versao, filtro)
+    if base is not None:
+        return base
+    if filtro.ativo():
+        return _chamar(_agregados_filtrados, caminho, versao, filtro)
+    return _chamar(_agregados, caminho, versao)
+
+
+@st.cache_resource(show_spinner="Indexando reclamações...")
+@em_cache(linhas=lambda indice: len(indice.comprimentos))
+def _indice(caminho, versao):
+    # A DESCRICAO é lida só para indexar e não fica em memória
+    return busca.construir_indice(colunar.ler_colunas(caminho, busca.COLUNAS_INDICE))
+
+
+@_cache_limitado(64, show_spinner=False)
+@em_cache(linhas=len)
+def _textos(caminho, versao, linhas, colunas):
+    return colunar.ler_linhas(caminho, linhas, colunas)
+
+
+@_cache_limitado(64, show_spinner="Ordenando reclamações...")
+@em_cache(linhas=len)
+def _ordem(caminho, versao, filtro, chave, decrescente):
+    return navegador.ordenar(_chamar(_indice_filtros, caminho, versao), filtro, chave, decrescente)
+
+
+@_cache_limitado(64, show_spinner="Agrupando categorias...")
+@em_cache()
+def _cubo(caminho, versao, filtro):
+    if filtro.ativo():
+        return categorias.cubo(_linhas_filtradas(caminho, versao, filtro))
+    return categorias.cubo(colunar.ler_colunas(caminho, categorias.COLUNAS))
+
+
+@st.cache_resource(show_spinner="Contando termos...")
+@em_cache(linhas=lambda contagens: len(contagens.chaves))
+def _termos(caminho, versao):
+    return termos.atualizar(caminho)
+
+
+@_cache_limitado(128, show_spinner="Contando termos...")
+@em_cache(linhas=len)
+def _termos_frequentes(caminho, versao, ngrama, filtro, quantidade):
+    return termos.mais_frequentes(_chamar(_termos, caminho, versao), ngrama, filtro.status, filtro.inicio,
+                                  filtro.fim, quantidade)
+
+
+# Cada conjunto de empresas selecionado é uma entrada: sem limite, seriam até
+# 2^n concatenações guardadas
+@_cache_limitado(16, show_spinner="Comparando empresas...")
+@em_cache()
+def _comparacao(arquivos, codigos):
+    frames = {
+        codigo: colunar.ler_colunas(caminho, comparacao.COLUNAS)
+        for codigo, (caminho, versao) in zip(codigos, arquivos)
+    }
+    return comparacao.comparar(comparacao.concatenar(frames))
+
+
+@_cache_limitado(8, show_spinner="Detectando dias atípicos...")
+@em_cache(linhas=lambda deteccao: int(deteccao.atipicos.sum()))
+def _anomalias(arquivos, metodo):
+    diarios = {caminho: _base(caminho, versao, filtros.Filtro()).diario for caminho, versao in arquivos}
+    with _trava:
+        anterior = _deteccoes.get(metodo)
+    deteccao = anomalias.atualizar(anterior, diarios, metodo)
+    with _trava:
+        _deteccoes[metodo] = deteccao
+    return deteccao
+
+
+@_cache_limitado(64, show_spinner=False)
+@em_cache(linhas=len)
+def _alertas(arquivos, metodo, caminho):
+    deteccao = _registrar([caminho for caminho, versao in arquivos], _anomalias, arquivos, metodo)
+    return anomalias.alertas(deteccao, caminho)
+
+
+@_cache_limitado(48, show_spinner="Montando gráficos...")
+@em_cache()
+def _figuras_comparacao(arquivos, codigos, nomes, frequencia):
+    resultado = _registrar([caminho for caminho, versao in arquivos], _comparacao, arquivos, codigos)
+    return comparacao.figuras_comparacao(resultado, dict(zip(codigos, nomes)), frequencia)
+
+
+@st.cache_resource
+def _empresas(diretorio, versao):
+    return registro.descobrir_empresas(diretorio)
+
+
+def _versao_atual(caminho):
+    """Versão atual do CSV, descartando as entradas da versão anterior."""
+    caminho = str(caminho)
+    versao = dados.versao_arquivo(caminho)
+    with _trava:
+        anterior = _versoes_carregadas.get(caminho)
+        _versoes_carregadas[caminho] = versao
+        antigas = _chamadas.pop(caminho, set()) if anterior not in (None, versao) else ()
+        for funcao, argumentos in antigas:
+            _tamanhos[funcao].pop(argumentos, None)
+        for chave in [chave for chave in _preparados if chave[0] == caminho and chave[1] != versao]:
+            del _preparados[chave]
+    for funcao, argumentos in antigas:
+        funcao.clear(*argumentos)
+    if anterior not in (None, versao):
+        _prontas.descartar(lambda chave: chave[0] == caminho and chave[1] != versao)
+    return caminho, versao
+
+
+def _pronta(caminho, versao, grafico, filtro, opcao, montar):
+    """Figura pronta do gráfico, montada com `montar()` só quando não está no cache."""
+    with medir('figura_pronta', empresa=Path(caminho).stem, grafico=grafico) as medicao:
+        figura, acerto = _prontas.obter((caminho, versao, grafico, filtro, opcao), montar)
+        medicao['cache'] = 'acerto' if acerto else 'falta'
+    return figura
+
+
+def carregar_empresa(caminho, colunas=None):
+    """Devolve as `colunas` (todas, se None) dos dados preparados da empresa."""
+    return _chamar(_carregar, *_versao_atual(caminho), None if colunas is None else tuple(colunas))
+
+
+def textos_empresa(caminho, linhas, colunas=busca.COLUNAS_TEXTO):
+    """Textos longos (DESCRICAO, URL) só das `linhas` pedidas, indexados pela posição.
+
+    As posições são as das linhas de `carregar_empresa`; só os row groups do
+    Parquet com alguma das linhas são lidos.
+    """
+    return _chamar(_textos, *_versao_atual(caminho), tuple(int(linha) for linha in linhas), tuple(colunas))
+
+
+def agregados_empresa(caminho):
+    """Devolve as métricas agregadas da empresa, atualizadas com as linhas novas do CSV."""
+    return _base(*_versao_atual(caminho), filtros.Filtro())
+
+
+def figuras_empresa(caminho, frequencia='D', filtro=filtros.Filtro()):
+    """Devolve os gráficos da empresa, montados uma vez por versão dos dados e filtro.
+
+    Só a série temporal depende da resolução. Com um backend SQL, os
+    agregados vêm de consultas no banco. Senão, sem filtro, vêm do
+    repositório de agregados; com filtro, das linhas selecionadas pelos
+    índices de `reclameaqui.filtros`.
+    """
+    caminho, versao = _versao_atual(caminho)
+
+    def _montar(chave):
+        # Os dias atípicos são os da série completa e não valem com filtro
+        alertas = None if filtro.ativo() or chave != 'numero_reclamacoes' else alertas_empresa(caminho)
+        return figuras.figura_empresa(chave, _base(caminho, versao, filtro), frequencia, alertas)
+
+    resultado = {}
+    for chave in figuras.GRAFICOS:
+        opcao = frequencia if chave in figuras.GRAFICOS_COM_FREQUENCIA else None
+        figura = _pronta(caminho, versao, chave, filtro, opcao, lambda: _montar(chave))
+        if figura is not None:
+            resultado[chave] = figura
+    return resultado
+
+
+def opcoes_filtro(caminho):
+    """Período e valores de STATUS e LOCAL disponíveis nos filtros da empresa."""
+    caminho, versao = _versao_atual(caminho)
+    opcoes = _pelo_banco(_opcoes_banco, caminho, versao)
+    if opcoes is None:
+        opcoes = filtros.opcoes(_chamar(_indice_filtros, caminho, versao))
+    return opcoes
+
+
+def indice_busca(caminho):
+    """Devolve o índice de busca da empresa, montado uma vez por versão dos dados.
+
+    As posições dos documentos são as linhas de `carregar_empresa(caminho, busca.COLUNAS)`.
+    """
+    return _chamar(_indice, *_versao_atual(caminho))
+
+
+def ordem_reclamacoes(caminho, filtro=filtros.Filtro(), chave='data', decrescente=False):
+    """Posições das reclamações que passam pelo filtro, ordenadas por `chave`.
+
+    As posições são as linhas de `carregar_empresa`; a ordem é calculada uma
+    vez por filtro e ordenação, e cada página é só um recorte dela.
+    """
+    return _chamar(_ordem, *_versao_atual(caminho), filtro, chave, decrescente)
+
+
+def cubo_categorias(caminho, filtro=filtros.Filtro()):
+    """Devolve o cubo de categorias das reclamações que passam pelo filtro.
+
+    Só o período e LOCAL exigem montar um cubo das linhas selecionadas; o
+    STATUS é uma dimensão do cubo e pode ser filtrado direto nele.
+    """
+    filtro = filtro._replace(status=())
+    return _chamar(_cubo, *_versao_atual(caminho), filtro)
+
+
+def figura_categorias(caminho, filtro=filtros.Filtro(), tipo='sunburst'):
+    """Gráfico de drill-down (sunburst ou treemap) das categorias da empresa."""
+    caminho, versao = _versao_atual(caminho)
+    return _pronta(caminho, versao, 'categorias', filtro, tipo, lambda: categorias.figura_categorias(
+        categorias.filtrar_cubo(cubo_categorias(caminho, filtro), filtro.status), tipo))
+
+
+def termos_frequentes(caminho, ngrama=1, filtro=filtros.Filtro(), quantidade=20):
+    """Termos (`ngrama` 1) ou pares de termos (2) mais frequentes nas reclamações da empresa.
+
+    As contagens por termo, STATUS e mês são atualizadas uma vez por versão
+    dos dados; o STATUS e o período são filtrados direto nelas, e LOCAL não
+    se aplica.
+    """
+    filtro = filtro._replace(locais=())
+    return _chamar(_termos_frequentes, *_versao_atual(caminho), ngrama, filtro, quantidade)
+
+
+def figura_termos(caminho, ngrama=1, filtro=filtros.Filtro(), quantidade=20):
+    """Gráfico de barras de `termos_frequentes`."""
+    filtro = filtro._replace(locais=())
+    caminho, versao = _versao_atual(caminho)
+    return _pronta(caminho, versao, 'termos', filtro, (ngrama, quantidade), lambda: termos.figura_termos(
+        _chamar(_termos_frequentes, caminho, versao, ngrama, filtro, quantidade)))
+
+
+def alertas_empresa(caminho, metodo=config.METODO_ANOMALIAS):
+    """Dias atípicos no volume diário de reclamações da empresa (`reclameaqui.anomalias`).
+
+    A detecção roda de uma vez sobre todas as empresas registradas, uma vez
+    por conjunto de versões dos dados, e só recalcula os dias posteriores ao
+    primeiro que mudou.
+    """
+    caminho = str(caminho)
+    caminhos = [str(empresa.caminho) for empresa in empresas().values()]
+    if caminho not in caminhos:
+        caminhos = [caminho]
+    arquivos = tuple(_versao_atual(outro) for outro in caminhos)
+    return _registrar(caminhos, _alertas, arquivos, metodo, caminho)
+
+
+def figuras_comparacao(empresas_selecionadas, frequencia='W'):
+    """Gráficos da comparação entre empresas, montados uma vez por conjunto de empresas e versão dos dados."""
+    arquivos = tuple(_versao_atual(empresa.caminho) for empresa in empresas_selecionadas)
+    codigos = tuple(empresa.codigo for empresa in empresas_selecionadas)
+    nomes = tuple(empresa.nome for empresa in empresas_selecionadas)
+    return _registrar(
+        [caminho for caminho, versao in arquivos],
+        _figuras_comparacao, arquivos, codigos, nomes, frequencia
+    )
+
+
+@st.cache_resource(show_spinner="Preparando empresas...")
+@em_cache(linhas=len)
+def _preparo(arquivos):
+    preparos = paralelo.preparar_empresas([caminho for caminho, versao in arquivos])
+    with _trava:
+        for preparo in preparos.values():
+            if (preparo.caminho, preparo.versao) in arquivos:
+                _preparados[(preparo.caminho, preparo.versao)] = preparo.agregados
+    return tuple(preparos)
+
+
+def preparar_empresas(empresas_registradas):
+    """Prepara as empresas em paralelo (`reclameaqui.paralelo`), uma vez por conjunto de versões dos dados.
+
+    Só as empresas com cache desatualizado são preparadas; os agregados que
+    voltam do pool são aproveitados por `agregados_empresa` e pelos gráficos.
+    Devolve os caminhos das empresas preparadas.
+    """
+    arquivos = tuple(_versao_atual(empresa.caminho) for empresa in empresas_registradas)
+    return _registrar([caminho for caminho, versao in arquivos], _preparo, arquivos)
+
+
+def empresas(diretorio=dados.DIRETORIO_DADOS):
+    """Empresas do registro, redescobertas só quando o diretório muda."""
+    return _empresas(str(diretorio), registro.versao_registro(diretorio))
+
+
+@st.cache_resource(show_spinner="Medindo importações...")
+def tempos_importacao():
+    """Tempos de importação da inicialização, medidos uma vez por processo."""
+    return inicializacao.medir_importacoes()
+
+
+def memoria_empresas():
+    """Memória aproximada dos resultados em cache, por empresa e estrutura, em MB.
+
+    Cada resultado é medido quando é calculado, e deixa de contar quando é
+    descartado: por uma nova versão dos dados ou, nos caches com limite de
+    entradas, por ser o menos usado.
+    """
+    def _empresa(caminhos):
+        return '+'.join(Path(caminho).stem for caminho in caminhos)
+
+    with _trava:
+        linhas = [
+            (_empresa(caminhos), funcao.__name__.lstrip('_'), tamanho)
+            for funcao, entradas in _tamanhos.items()
+            for caminhos, tamanho in entradas.values()
+        ]
+    linhas.extend(
+        (_empresa([caminho]), 'figuras_prontas', tamanho)
+        for caminho, tamanho in _prontas.bytes_por(lambda chave: chave[0]).items()
+    )
+    DF = pd.DataFrame(linhas, columns=['empresa', 'estrutura', 'bytes'])
+    DF = DF.groupby(['empresa', 'estrutura'], as_index=False)['bytes'].sum()
+    DF['mb'] = (DF.pop('bytes') / 2 ** 20).round(2)
+    return DF.sort_values(['empresa', 'mb'], ascending=[True, False], ignore_index=True)
+
+
+def recarregar_dados(diretorio=dados.DIRETORIO_DADOS):
+    """Descarta todos os dados e gráficos em cache, forçando uma nova leitura.
+
+    Os repositórios incrementais de agregados e de termos das empresas
+    registradas também são apagados, para que sejam reconstruídos do CSV.
+    """
+    for empresa in registro.descobrir_empresas(diretorio).values():
+        for modulo in (agregados, termos):
+            modulo.caminho_repositorio(empresa.caminho).unlink(missing_ok=True)
+    for funcao in (_empresas, _preparo, _carregar, _agregados, _indice_filtros, _agregados_filtrados,
+                   _agregados_banco, _opcoes_banco, _indice, _textos, _ordem, _cubo, _termos, _termos_frequentes,
+                   _anomalias, _alertas, _comparacao, _figuras_comparacao):
+        funcao.clear()
+    _prontas.limpar()
+    with _trava:
+        _versoes_carregadas.clear()
+        _chamadas.clear()
+        _preparados.clear()
+        _tamanhos.clear()
+        _deteccoes.clear()
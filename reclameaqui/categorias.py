@@ -0,0 +1,101 @@
+"""Hierarquia da coluna CATEGORIA e o cubo de contagens por nível.
+
+CATEGORIA guarda uma hierarquia separada por `<->` (por exemplo
+"Demora na execução<->Plano<->Planos de Saúde<->Hapvida Saúde"). Cada
+categoria distinta é quebrada em níveis uma única vez. As linhas chegam aos
+níveis pelos códigos da coluna categórica, sem processar texto linha a
+linha. O cubo conta as reclamações por categoria × STATUS × mês. Os gráficos
+de drill-down só filtram e somam esse cubo.
+"""
+import pandas as pd
+import plotly.graph_objects as go
+
+SEPARADOR = '<->'
+
+# Colunas dos dados preparados usadas para montar o cubo
+COLUNAS = ('CATEGORIA', 'STATUS', 'data')
+
+
+def niveis(categorias):
+    """Tabela com uma linha por categoria distinta e uma coluna por nível.
+
+    Categorias mais rasas ficam com None nos níveis finais.
+    """
+    partes = pd.Series(categorias, dtype=object).str.split(SEPARADOR)
+    tabela = pd.DataFrame(partes.tolist(), index=categorias)
+    tabela.columns = [f'nivel_{i + 1}' for i in range(tabela.shape[1])]
+    return tabela
+
+
+def cubo(DF):
+    """Contagem de reclamações por nível de categoria, STATUS e mês."""
+    categoria = DF['CATEGORIA'].astype('category')
+    contagem = pd.DataFrame({
+        'categoria': categoria.cat.codes,
+        'STATUS': DF['STATUS'],
+        'mes': DF['data'].dt.to_period('M').dt.to_timestamp(),
+    }).groupby(['categoria', 'STATUS', 'mes'], observed=True).size().reset_index(name='contagem')
+    contagem = contagem[contagem['categoria'] >= 0]
+
+    tabela = niveis(categoria.cat.categories).reset_index(drop=True)
+    resultado = tabela.take(contagem['categoria'].to_numpy()).reset_index(drop=True)
+    for coluna in ('STATUS', 'mes', 'contagem'):
+        resultado[coluna] = contagem[coluna].to_numpy()
+    return resultado
+
+
+def colunas_niveis(cubo):
+    """Nomes das colunas de nível de um cubo, do mais alto ao mais baixo."""
+    return [coluna for coluna in cubo.columns if coluna.startswith('nivel_')]
+
+
+def filtrar_cubo(cubo, status=None, inicio=None, fim=None):
+    """Soma o cubo por nível de categoria, restrito aos STATUS e meses dados."""
+    mascara = pd.Series(True, index=cubo.index)
+    if status:
+        mascara &= cubo['STATUS'].isin(status)
+    if inicio is not None:
+        mascara &= cubo['mes'] >= pd.Timestamp(inicio)
+    if fim is not None:
+        mascara &= cubo['mes'] <= pd.Timestamp(fim)
+    niveis_cubo = colunas_niveis(cubo)
+    return cubo[mascara].groupby(niveis_cubo, dropna=False, sort=False)['contagem'].sum().reset_index()
+
+
+def nos(contagens):
+    """Nós da árvore de categorias: id, rótulo, pai e total de reclamações.
+
+    Uma categoria pode ser ao mesmo tempo folha e pai de outras mais
+    profundas. Por isso o total de cada nó soma as suas próprias
+    reclamações às dos descendentes.
+    """
+    niveis_cubo = colunas_niveis(contagens)
+    partes = []
+    for profundidade, nivel in enumerate(niveis_cubo, start=1):
+        caminho = niveis_cubo[:profundidade]
+        grupo = contagens[contagens[nivel].notna()].groupby(caminho, sort=False)['contagem'].sum()
+        chaves = [chave if isinstance(chave, tuple) else (chave,) for chave in grupo.index]
+        partes.append(pd.DataFrame({
+            'id': [SEPARADOR.join(chave) for chave in chaves],
+            'rotulo': [chave[-1] for chave in chaves],
+            'pai': [SEPARADOR.join(chave[:-1]) for chave in chaves],
+            'total': grupo.to_numpy(),
+        }))
+    return pd.concat(partes, ignore_index=True)
+
+
+def figura_categorias(contagens, tipo='sunburst'):
+    """Gráfico de drill-down (sunburst ou treemap) das contagens por nível."""
+    arvore = nos(contagens)
+    construtor = go.Sunburst if tipo == 'sunburst' else go.Treemap
+    fig = go.Figure(construtor(
+        ids=arvore['id'],
+        labels=arvore['rotulo'],
+        parents=arvore['pai'],
+        values=arvore['total'],
+        branchvalues='total',
+        marker=dict(colors=arvore['total'], colorscale='Viridis'),
+        hovertemplate='%{label}<br>Reclamações: %{value}<extra></extra>',
+    ))
+    fig.update_layout(title='Reclamações por Categoria', title_x=0.5, margin=dict(t=60, l=0, r=0, b=0))
+    return fig
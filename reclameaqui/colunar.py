@@ -0,0 +1,217 @@
+"""Cópia colunar (Parquet) dos arquivos RECLAMEAQUI_*.csv.
+
+Cada CSV é convertido uma única vez em um Parquet tipado, com LOCAL, STATUS e
+CATEGORIA categóricas e as colunas derivadas já calculadas. O dashboard lê do
+Parquet apenas as colunas de que precisa. A versão do CSV de origem fica nos
+metadados do arquivo, e uma alteração no CSV dispara a reconstrução.
+
+Na leitura, as colunas inteiras são reduzidas ao menor tipo que comporta os
+seus valores, e os textos longos (DESCRICAO, URL) podem ser lidos só para as
+linhas exibidas, com `ler_linhas`.
+
+A conversão lê o CSV em blocos (`config.TAMANHO_BLOCO`) e ordena as linhas por
+data mês a mês, então não precisa do arquivo inteiro em memória.
+"""
+import json
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from reclameaqui import armazenamento, config, dados
+
+DIRETORIO_CACHE = dados.DIRETORIO_DADOS / '.cache'
+
+COLUNAS_CATEGORICAS = ['LOCAL', 'STATUS', 'CATEGORIA']
+
+_CHAVE_METADADOS = b'reclameaqui'
+
+
+def caminho_parquet(caminho_csv):
+    """Caminho do Parquet correspondente a um CSV."""
+    return DIRETORIO_CACHE / (Path(caminho_csv).stem + '.parquet')
+
+
+def _metadados(caminho):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        esquema = pq.read_schema(caminho)
+    except (FileNotFoundError, pa.ArrowInvalid):
+        return None
+    bruto = (esquema.metadata or {}).get(_CHAVE_METADADOS)
+    return json.loads(bruto) if bruto else None
+
+
+def _separar_por_mes(caminho_csv, diretorio, tamanho_bloco):
+    """Lê e prepara o CSV em blocos, gravando as linhas de cada mês em um arquivo Arrow à parte.
+
+    Devolve os arquivos de cada mês, os valores de cada coluna categórica e o
+    número de datas inválidas descartadas.
+    """
+    import pyarrow as pa
+
+    arquivos, escritores, esquema = {}, {}, None
+    valores = {coluna: set() for coluna in COLUNAS_CATEGORICAS}
+    vistos = np.empty(0, dtype='int64')
+    datas_invalidas = 0
+    try:
+        for DF in dados.ler_em_blocos(caminho_csv, tamanho_bloco):
+            DF, vistos = dados.descartar_repetidos(DF, vistos)
+            DF = dados.preparar_dados(DF)
+            datas_invalidas += DF.attrs['datas_invalidas']
+            if not len(DF):
+                continue
+            for coluna in valores:
+                valores[coluna].update(DF[coluna].dropna().unique())
+
+            if 'data' in DF.columns:
+                meses = DF['data'].to_numpy().astype('datetime64[M]')
+            else:
+                meses = np.zeros(len(DF), dtype='datetime64[M]')
+            ordem = np.argsort(meses, kind='stable')
+            meses = meses[ordem]
+            tabela = pa.Table.from_pandas(DF, preserve_index=False).take(ordem)
+            esquema = esquema or tabela.schema
+            limites = np.flatnonzero(meses[1:] != meses[:-1]) + 1
+            for inicio, fim in zip(np.r_[0, limites], np.r_[limites, len(meses)]):
+                mes = meses[inicio]
+                if mes not in escritores:
+                    arquivos[mes] = diretorio / f'{mes}.arrow'
+                    escritores[mes] = pa.ipc.new_file(str(arquivos[mes]), esquema)
+                escritores[mes].write_table(tabela.slice(inicio, fim - inicio))
+    finally:
+        for escritor in escritores.values():
+            escritor.close()
+    return arquivos, valores, datas_invalidas
+
+
+def _tabela(DF, categorias, metadados):
+    """Tabela Arrow de `DF`, com as categorias e os metadados do Parquet final."""
+    import pyarrow as pa
+
+    for coluna, valores in categorias.items():
+        DF[coluna] = pd.Categorical(DF[coluna], categories=valores)
+    tabela = pa.Table.from_pandas(DF, preserve_index=False)
+    return tabela.replace_schema_metadata({
+        **(tabela.schema.metadata or {}),
+        _CHAVE_METADADOS: json.dumps(metadados).encode(),
+    })
+
+
+def converter(caminho_csv, destino, tamanho_bloco=config.TAMANHO_BLOCO):
+    """Lê o CSV, prepara os dados e grava o Parquet tipado em `destino`.
+
+    O CSV é lido em blocos de `tamanho_bloco` linhas e as linhas de cada mês
+    vão para um arquivo temporário; cada mês é ordenado por data ao ser
+    copiado para o Parquet. A memória usada é a de um bloco ou do maior mês.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    versao = dados.versao_arquivo(caminho_csv)
+    destino = Path(destino)
+    # O Parquet só toma o lugar do destino quando está completo
+    with armazenamento.gravacao_atomica(destino) as temporario, \
+            tempfile.TemporaryDirectory(dir=destino.parent) as diretorio:
+        arquivos, valores, datas_invalidas = _separar_por_mes(caminho_csv, Path(diretorio), tamanho_bloco)
+        categorias = {coluna: sorted(valores[coluna]) for coluna in COLUNAS_CATEGORICAS}
+        metadados = {'versao_origem': list(versao), 'datas_invalidas': datas_invalidas}
+
+        if not arquivos:
+            vazio = dados.preparar_dados(pd.read_csv(caminho_csv, dtype=dados.ESQUEMA, nrows=0))
+            pq.write_table(_tabela(vazio, categorias, metadados), temporario)
+        else:
+            # Ordenado por data, cada row group cobre um intervalo contíguo de
+            # datas; os meses são juntados até formar um bloco
+            escritor, pendentes = None, []
+            for numero, mes in enumerate(sorted(arquivos)):
+                with pa.memory_map(str(arquivos[mes])) as origem:
+                    DF = pa.ipc.open_file(origem).read_all().to_pandas()
+                pendentes.append(DF.sort_values('data', kind='stable') if 'data' in DF.columns else DF)
+                if numero < len(arquivos) - 1 and sum(map(len, pendentes)) < (tamanho_bloco or np.inf):
+                    continue
+                tabela = _tabela(pd.concat(pendentes, ignore_index=True), categorias, metadados)
+                escritor = escritor or pq.ParquetWriter(temporario, tabela.schema)
+                escritor.write_table(tabela)
+                pendentes = []
+            escritor.close()
+    return destino
+
+
+def em_dia(caminho_csv):
+    """Se o Parquet do CSV existe e corresponde à versão atual do CSV."""
+    metadados = _metadados(caminho_parquet(caminho_csv))
+    return metadados is not None and tuple(metadados['versao_origem']) == dados.versao_arquivo(caminho_csv)
+
+
+def garantir_parquet(caminho_csv):
+    """Devolve o Parquet do CSV, convertendo-o se não existir ou estiver desatualizado."""
+    destino = caminho_parquet(caminho_csv)
+    if not em_dia(caminho_csv):
+        converter(caminho_csv, destino)
+    return destino
+
+
+def datas_invalidas(caminho_csv):
+    """Número de reclamações com datas inválidas descartadas na conversão."""
+    return _metadados(garantir_parquet(caminho_csv))['datas_invalidas']
+
+
+def ler_em_lotes(caminho_csv, colunas, tamanho_lote=config.TAMANHO_BLOCO):
+    """Lê do Parquet as `colunas` em DataFrames de até `tamanho_lote` linhas."""
+    import pyarrow.parquet as pq
+
+    arquivo = pq.ParquetFile(garantir_parquet(caminho_csv))
+    for lote in arquivo.iter_batches(batch_size=tamanho_lote or max(arquivo.metadata.num_rows, 1), columns=colunas):
+        yield lote.to_pandas()
+
+
+def ler_colunas(caminho_csv, colunas=None):
+    """Lê do Parquet somente as `colunas` pedidas (todas, se None).
+
+    Colunas pedidas que não existem no arquivo são ignoradas.
+    """
+    origem = garantir_parquet(caminho_csv)
+    if colunas is not None:
+        import pyarrow.parquet as pq
+
+        existentes = pq.read_schema(origem).names
+        colunas = [coluna for coluna in colunas if coluna in existentes]
+    DF = reduzir_inteiros(pd.read_parquet(origem, columns=colunas))
+    DF.attrs['datas_invalidas'] = _metadados(origem)['datas_invalidas']
+    return DF
+
+
+def reduzir_inteiros(DF):
+    """Converte as colunas inteiras para o menor tipo que comporta os seus valores."""
+    for coluna in DF.columns:
+        if pd.api.types.is_integer_dtype(DF[coluna].dtype):
+            DF[coluna] = pd.to_numeric(DF[coluna], downcast='integer')
+    return DF
+
+
+def ler_linhas(caminho_csv, linhas, colunas):
+    """Lê do Parquet as `colunas` só das `linhas` pedidas, indexadas pela posição.
+
+    As posições são as das linhas de `ler_colunas`. Só os row groups que
+    contêm alguma das linhas são lidos.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    arquivo = pq.ParquetFile(garantir_parquet(caminho_csv))
+    colunas = [coluna for coluna in colunas if coluna in arquivo.schema_arrow.names]
+    linhas = np.asarray(linhas, dtype='int64')
+    inicios = np.cumsum([0] + [arquivo.metadata.row_group(i).num_rows for i in range(arquivo.num_row_groups)])
+    grupos = np.searchsorted(inicios, linhas, side='right') - 1
+    ordem = np.argsort(grupos, kind='stable')
+    partes = [arquivo.schema_arrow.empty_table().select(colunas)]
+    for grupo in np.unique(grupos):
+        tabela = arquivo.read_row_group(int(grupo), columns=colunas)
+        partes.append(tabela.take(linhas[grupos == grupo] - inicios[grupo]))
+    DF = pa.concat_tables(partes).to_pandas()
+    DF.index = linhas[ordem]
+    return DF.loc[linhas]
@@ -0,0 +1,114 @@
+"""Comparação entre empresas calculada sobre um único DataFrame.
+
+Os dados das empresas selecionadas são concatenados em um frame com a coluna
+categórica EMPRESA. Cada métrica sai de uma única passada de groupby sobre
+esse frame (volume diário, mistura de STATUS, principais estados e
+distribuição do tamanho das descrições), em vez de uma passada por empresa.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from reclameaqui import config, series
+
+# Colunas dos dados preparados usadas na comparação
+COLUNAS = ('data', 'STATUS', 'LOCAL', 'tamanho_descricao')
+
+CLASSES_TAMANHO = 30
+
+
+class Comparacao(NamedTuple):
+    diario: pd.DataFrame
+    status: pd.DataFrame
+    estados: pd.DataFrame
+    tamanhos: pd.DataFrame
+
+
+def concatenar(frames):
+    """Um único frame com as linhas de todas as empresas e a coluna EMPRESA.
+
+    `frames` mapeia o código de cada empresa para os seus dados preparados.
+    """
+    DF = pd.concat(
+        [DF[list(COLUNAS)] for DF in frames.values()],
+        keys=list(frames), names=['EMPRESA', None]
+    ).reset_index(level='EMPRESA')
+    DF['EMPRESA'] = pd.Categorical(DF['EMPRESA'], categories=list(frames))
+    for coluna in ('STATUS', 'LOCAL'):
+        DF[coluna] = DF[coluna].astype('category')
+    return DF.reset_index(drop=True)
+
+
+def _percentual(contagens):
+    return contagens / contagens.sum().replace(0, 1) * 100
+
+
+def comparar(DF, top_estados=10):
+    """Métricas de todas as empresas de `DF`, uma coluna por empresa."""
+    diario = DF.groupby(['data', 'EMPRESA'], observed=False).size().unstack(fill_value=0)
+    status = DF.groupby(['STATUS', 'EMPRESA'], observed=False).size().unstack(fill_value=0)
+    estados = DF.groupby(['LOCAL', 'EMPRESA'], observed=False).size().unstack(fill_value=0)
+
+    tamanhos = DF['tamanho_descricao'].to_numpy()
+    bordas = np.histogram_bin_edges(tamanhos, bins=CLASSES_TAMANHO) if len(tamanhos) else np.arange(CLASSES_TAMANHO + 1)
+    classes = np.clip(np.searchsorted(bordas, tamanhos, side='right') - 1, 0, CLASSES_TAMANHO - 1)
+    distribuicao = (
+        pd.DataFrame({'classe': classes, 'EMPRESA': DF['EMPRESA'].to_numpy()})
+        .groupby(['classe', 'EMPRESA'], observed=False).size().unstack(fill_value=0)
+        .reindex(range(CLASSES_TAMANHO), fill_value=0)
+    )
+    distribuicao.index = (bordas[:-1] + bordas[1:]) / 2
+
+    status = status[status.sum(axis=1) > 0]
+    estados = estados.loc[estados.sum(axis=1).nlargest(top_estados).index]
+    return Comparacao(
+        diario=diario,
+        status=_percentual(status).loc[status.sum(axis=1).sort_values(ascending=False).index],
+        estados=estados,
+        tamanhos=_percentual(distribuicao),
+    )
+
+
+def figuras_comparacao(comparacao, nomes, frequencia='W'):
+    """Gráficos sobrepostos da comparação; `nomes` traduz códigos em nomes de exibição."""
+    figuras = {}
+
+    volume = go.Figure()
+    diario = series.reamostrar(comparacao.diario, frequencia)
+    for codigo in diario.columns:
+        serie = series.reduzir(diario[codigo], config.LIMITE_PONTOS_SERIE, config.METODO_REDUCAO_SERIE)
+        volume.add_trace(go.Scatter(
+            x=serie.index, y=serie.to_numpy(), mode='lines', name=nomes[codigo],
+            hovertemplate='Data: %{x}<br>Reclamações: %{y}<extra>' + nomes[codigo] + '</extra>'
+        ))
+    volume.update_layout(title='Número de Reclamações por Empresa', xaxis_title='Data',
+                         yaxis_title='Número de Reclamações', hovermode='x')
+    volume.update_xaxes(rangeslider_visible=True)
+    figuras['numero_reclamacoes'] = volume
+
+    for chave, tabela, titulo, eixo_x, eixo_y in (
+        ('reclamacao_status', comparacao.status, 'Status das Reclamações por Empresa', 'Status', '% das Reclamações'),
+        ('estado_reclamacao', comparacao.estados, 'Top 10 Estados com Mais Reclamações', 'Estado', 'Número de Reclamações'),
+    ):
+        figura = go.Figure([
+            go.Bar(x=tabela.index.astype(str), y=tabela[codigo].to_numpy(), name=nomes[codigo])
+            for codigo in tabela.columns
+        ])
+        figura.update_layout(title=titulo, xaxis_title=eixo_x, yaxis_title=eixo_y, barmode='group',
+                             xaxis=dict(tickangle=-45))
+        figuras[chave] = figura
+
+    tamanhos = go.Figure([
+        go.Bar(x=comparacao.tamanhos.index, y=comparacao.tamanhos[codigo].to_numpy(), name=nomes[codigo], opacity=0.6)
+        for codigo in comparacao.tamanhos.columns
+    ])
+    tamanhos.update_layout(title='Distribuição do Tamanho das Descrições por Empresa',
+                           xaxis_title='Tamanho da Descrição (número de caracteres)',
+                           yaxis_title='% das Reclamações', barmode='overlay', bargap=0)
+    figuras['tamanho_descricao'] = tamanhos
+
+    for figura in figuras.values():
+        figura.update_layout(title_x=0.5, template='plotly_white')
+    return figuras
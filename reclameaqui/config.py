@@ -0,0 +1,38 @@
+"""Configurações do dashboard, lidas de variáveis de ambiente."""
+import os
+
+
+def _inteiro(nome, padrao):
+    return int(os.environ.get(nome, padrao))
+
+
+# Número máximo de marcas no rug acima do histograma de tamanho das descrições
+LIMITE_PONTOS_RUG = _inteiro('RECLAMEAQUI_LIMITE_RUG', 300)
+
+# Número máximo de pontos da série temporal; acima dele a série é reduzida
+LIMITE_PONTOS_SERIE = _inteiro('RECLAMEAQUI_LIMITE_SERIE', 1500)
+
+# Método de redução da série temporal: 'lttb' ou 'minmax'
+METODO_REDUCAO_SERIE = os.environ.get('RECLAMEAQUI_METODO_SERIE', 'lttb')
+
+# Linhas lidas do CSV por bloco na ingestão; 0 lê o arquivo inteiro de uma vez
+TAMANHO_BLOCO = _inteiro('RECLAMEAQUI_TAMANHO_BLOCO', 20_000)
+
+# Onde os gráficos são agregados: 'pandas', 'sqlite' ou 'duckdb' (veja `reclameaqui.banco`)
+BACKEND = os.environ.get('RECLAMEAQUI_BACKEND', 'pandas')
+
+# Trabalhadores que preparam as empresas em paralelo; 0 usa um por núcleo
+TRABALHADORES_PREPARO = _inteiro('RECLAMEAQUI_TRABALHADORES', 0)
+
+# Pool do preparo em paralelo: 'processos' ou 'threads'
+POOL_PREPARO = os.environ.get('RECLAMEAQUI_POOL', 'processos')
+
+# Memória máxima, em MB, das figuras guardadas entre as execuções, medida pelo JSON (veja `reclameaqui.prontas`)
+LIMITE_FIGURAS_MB = _inteiro('RECLAMEAQUI_LIMITE_FIGURAS_MB', 64)
+
+# Destino do log JSON das medições (veja `reclameaqui.instrumentacao`): vazio
+# desliga, 'stderr' ou o caminho de um arquivo
+LOG_MEDICOES = os.environ.get('RECLAMEAQUI_LOG_MEDICOES', '')
+
+# Referência da detecção de dias atípicos: 'semanal' ou 'mediana' (veja `reclameaqui.anomalias`)
+METODO_ANOMALIAS = os.environ.get('RECLAMEAQUI_METODO_ANOMALIAS', 'semanal')
@@ -0,0 +1,118 @@
+"""Leitura e preparação dos arquivos RECLAMEAQUI_*.csv."""
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from reclameaqui import config
+from reclameaqui.instrumentacao import medir
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_DADOS = Path(__file__).resolve().parent.parent
+
+# Tipos das colunas dos arquivos do Reclame Aqui. As colunas numéricas usam os
+# inteiros anuláveis do pandas para que uma célula vazia não vire float.
+ESQUEMA = {
+    'ID': 'Int64',
+    'TEMA': 'string',
+    'LOCAL': 'string',
+    'TEMPO': 'string',
+    'CATEGORIA': 'string',
+    'STATUS': 'string',
+    'DESCRICAO': 'string',
+    'URL': 'string',
+    'ANO': 'Int16',
+    'MES': 'Int8',
+    'DIA': 'Int8',
+    'DIA_DO_ANO': 'Int16',
+    'SEMANA_DO_ANO': 'Int8',
+    'DIA_DA_SEMANA': 'Int8',
+    'TRIMETRES': 'Int8',
+    'CASOS': 'Int32',
+}
+
+
+def versao_arquivo(caminho):
+    """Identifica a versão de um arquivo pelo instante de modificação e tamanho."""
+    info = Path(caminho).stat()
+    return (info.st_mtime_ns, info.st_size)
+
+
+def montar_datas(ano, mes, dia):
+    """Monta as datas a partir das colunas inteiras, com NaT onde forem inválidas.
+
+    Tudo é feito com aritmética de `datetime64` do NumPy, sem formatar texto
+    linha a linha.
+    """
+    ano = ano.to_numpy(dtype='int64', na_value=0)
+    mes = mes.to_numpy(dtype='int64', na_value=0)
+    dia = dia.to_numpy(dtype='int64', na_value=0)
+    inicio_mes = ((ano - 1970) * 12 + (mes - 1)).astype('datetime64[M]')
+    datas = inicio_mes.astype('datetime64[D]') + (dia - 1)
+    # Um dia além do fim do mês (31/02, por exemplo) cai no mês seguinte
+    validas = (ano > 0) & (mes >= 1) & (mes <= 12) & (dia >= 1) & (datas.astype('datetime64[M]') == inicio_mes)
+    datas[~validas] = np.datetime64('NaT')
+    return datas.astype('datetime64[ns]')
+
+
+def preparar_dados(DF):
+    """Cria as colunas derivadas `data` e `tamanho_descricao`.
+
+    Reclamações sem ID são descartadas, e as com o mesmo ID, coletadas mais
+    de uma vez, ficam só com a primeira ocorrência. O número de datas
+    inválidas descartadas fica em `DF.attrs['datas_invalidas']`.
+    """
+    if 'ID' in DF.columns:
+        DF = DF[DF['ID'].notna() & ~DF['ID'].duplicated()]
+
+    datas_invalidas = 0
+    if {'ANO', 'MES', 'DIA'}.issubset(DF.columns):
+        with medir('montar_datas', linhas=len(DF)):
+            data = montar_datas(DF['ANO'], DF['MES'], DF['DIA'])
+        validas = ~np.isnat(data)
+        datas_invalidas = int((~validas).sum())
+        DF['data'] = data
+        if datas_invalidas:
+            logger.info("%d datas inválidas foram encontradas.", datas_invalidas)
+            DF = DF[validas]
+    else:
+        logger.warning("As colunas 'ANO', 'MES' e 'DIA' não estão presentes no DataFrame.")
+
+    DF['tamanho_descricao'] = DF['DESCRICAO'].str.len().fillna(0).astype('int32')
+    DF.attrs['datas_invalidas'] = datas_invalidas
+    return DF
+
+
+def ler_em_blocos(origem, tamanho_bloco=config.TAMANHO_BLOCO, colunas=None, **opcoes):
+    """Lê o CSV em blocos de `tamanho_bloco` linhas, com só as `colunas` pedidas.
+
+    Com `tamanho_bloco` 0 o arquivo é lido de uma vez, em um único bloco. As
+    `opcoes` são repassadas ao `pd.read_csv`.
+    """
+    if not tamanho_bloco:
+        yield pd.read_csv(origem, dtype=ESQUEMA, usecols=colunas, **opcoes)
+        return
+    with pd.read_csv(origem, dtype=ESQUEMA, usecols=colunas, chunksize=tamanho_bloco, **opcoes) as leitor:
+        yield from leitor
+
+
+def descartar_repetidos(DF, vistos):
+    """Remove de `DF` as reclamações sem ID ou cujo ID está em `vistos`, um array ordenado.
+
+    Devolve o DataFrame e os IDs vistos atualizados com os de `DF`, para que
+    os blocos de um arquivo, lidos em sequência, fiquem só com a primeira
+    ocorrência de cada ID, como na leitura do arquivo inteiro.
+    """
+    if DF['ID'].hasnans:
+        DF = DF[DF['ID'].notna()]
+    ids = DF['ID'].to_numpy(dtype='int64')
+    posicoes = np.searchsorted(vistos, ids)
+    repetidos = posicoes < len(vistos)
+    repetidos[repetidos] = vistos[posicoes[repetidos]] == ids[repetidos]
+    if repetidos.any():
+        DF = DF[~repetidos]
+    # Os dois trechos já ordenados são intercalados em tempo linear
+    vistos = np.sort(np.concatenate([vistos, np.unique(ids[~repetidos])]), kind='stable')
+    return DF, vistos
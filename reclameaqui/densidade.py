@@ -0,0 +1,71 @@
+"""Estimativa de densidade (KDE) gaussiana calculada só com NumPy.
+
+Os valores são distribuídos em uma grade regular por binning linear e a grade
+é convoluída com o núcleo gaussiano via FFT. O custo é O(n + m log m) para n
+valores e m pontos de grade, em vez do O(n·m) da avaliação direta.
+"""
+import numpy as np
+
+PONTOS_GRADE = 512
+
+
+def largura_banda(valores, bw_method=0.5, pesos=None):
+    """Largura de banda no mesmo critério de `bw_method` escalar do pandas/SciPy.
+
+    O desvio padrão do núcleo é `bw_method` vezes o desvio padrão amostral dos
+    valores.
+    """
+    valores = np.asarray(valores, dtype='float64')
+    pesos = np.ones_like(valores) if pesos is None else np.asarray(pesos, dtype='float64')
+    n = pesos.sum()
+    if n < 2:
+        return 0.0
+    media = np.dot(pesos, valores) / n
+    variancia = np.dot(pesos, (valores - media) ** 2) / (n - 1)
+    return bw_method * float(np.sqrt(variancia))
+
+
+def kde(valores, bw_method=0.5, pesos=None, pontos=PONTOS_GRADE):
+    """Curva de densidade dos `valores`, opcionalmente ponderados por `pesos`.
+
+    Devolve `(x, densidade)`, com a grade estendida três larguras de banda
+    além dos extremos. A integral da densidade é 1. Com menos de dois valores
+    ou variância nula, não há curva e os dois vetores vêm vazios.
+    """
+    valores = np.asarray(valores, dtype='float64')
+    pesos = np.ones_like(valores) if pesos is None else np.asarray(pesos, dtype='float64')
+    h = largura_banda(valores, bw_method, pesos)
+    if h <= 0:
+        return np.empty(0), np.empty(0)
+
+    inicio = valores.min() - 3 * h
+    fim = valores.max() + 3 * h
+    x = np.linspace(inicio, fim, pontos)
+    passo = x[1] - x[0]
+
+    # Binning linear: cada valor divide seu peso entre os dois pontos vizinhos
+    posicao = (valores - inicio) / passo
+    indice = np.clip(np.floor(posicao).astype('int64'), 0, pontos - 2)
+    fracao = posicao - indice
+    grade = np.bincount(indice, weights=pesos * (1 - fracao), minlength=pontos)
+    grade += np.bincount(indice + 1, weights=pesos * fracao, minlength=pontos)
+
+    alcance = min(pontos - 1, int(np.ceil(4 * h / passo)))
+    deslocamentos = np.arange(-alcance, alcance + 1) * passo
+    nucleo = np.exp(-0.5 * (deslocamentos / h) ** 2) / (h * np.sqrt(2 * np.pi))
+
+    tamanho = 1 << int(np.ceil(np.log2(pontos + 2 * alcance)))
+    convolucao = np.fft.irfft(np.fft.rfft(grade, tamanho) * np.fft.rfft(nucleo, tamanho), tamanho)
+    densidade = convolucao[alcance:alcance + pontos] / pesos.sum()
+    return x, np.clip(densidade, 0, None)
+
+
+def kde_em_contagens(valores, largura_classe, bw_method=0.5, pesos=None, pontos=PONTOS_GRADE):
+    """Curva de densidade na escala de um histograma de classes de `largura_classe`.
+
+    Multiplicar a densidade pelo total e pela largura das classes dá o número
+    esperado de valores por classe, comparável às barras do histograma.
+    """
+    x, densidade = kde(valores, bw_method, pesos, pontos)
+    total = len(valores) if pesos is None else float(np.sum(pesos))
+    return x, densidade * total * largura_classe
@@ -0,0 +1,222 @@
+"""Exportação dos dashboards das empresas para HTML e JSON, sem o Streamlit.
+
+Para cada empresa são gravados `<CODIGO>.html`, autocontido (com o plotly.js
+embutido), e `<CODIGO>.json`, com o resumo, as tabelas e as figuras, além de
+um `index.html` com links para todas. Os gráficos e tabelas saem do mesmo
+pipeline do dashboard: Parquet, repositórios de agregados e de termos em
+`.cache/` e as figuras de `reclameaqui.figuras`. As empresas são exportadas
+em paralelo, em um pool de processos, e uma empresa cujo CSV não mudou
+desde a última exportação é pulada:
+
+    python -m reclameaqui.exportar [--saida DIR] [--frequencia D|W|M] [--forcar] [CODIGO ...]
+"""
+import argparse
+import html
+import json
+import logging
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import NamedTuple
+
+import pandas as pd
+
+from reclameaqui import anomalias, armazenamento, config, dados, figuras, paralelo, registro, series, termos
+
+logger = logging.getLogger(__name__)
+
+DIRETORIO_SAIDA = dados.DIRETORIO_DADOS / 'relatorios'
+
+# Tamanho das tabelas de estados e de termos
+TOP_ESTADOS = 10
+TOP_TERMOS = 20
+
+
+class Exportacao(NamedTuple):
+    codigo: str
+    situacao: str
+    segundos: float
+
+
+def _tabela(contagem, rotulo):
+    return pd.DataFrame({rotulo: contagem.index.astype(str), 'reclamacoes': contagem.to_numpy(dtype='int64')})
+
+
+def resumo_empresa(agregados, contagens, alertas):
+    """Resumo e tabelas da empresa, a partir dos agregados, das contagens de termos e dos dias atípicos."""
+    diario = agregados.diario
+    status = _tabela(agregados.status, 'status')
+    status['percentual'] = (100 * status['reclamacoes'] / max(int(status['reclamacoes'].sum()), 1)).round(1)
+    resumo = {
+        'reclamacoes': int(diario.sum()),
+        'datas_invalidas': int(agregados.datas_invalidas),
+        'inicio': diario.index.min().date().isoformat() if len(diario) else None,
+        'fim': diario.index.max().date().isoformat() if len(diario) else None,
+    }
+    tabelas = {
+        'status': status,
+        'estados': _tabela(agregados.estados.nlargest(TOP_ESTADOS), 'estado'),
+        'palavras': termos.mais_frequentes(contagens, 1, quantidade=TOP_TERMOS),
+        'pares_de_palavras': termos.mais_frequentes(contagens, 2, quantidade=TOP_TERMOS),
+        'dias_atipicos': alertas.assign(data=alertas['data'].dt.strftime('%Y-%m-%d')),
+    }
+    return resumo, tabelas
+
+
+def _gravar(caminho, texto):
+    with armazenamento.gravacao_atomica(caminho) as temporario:
+        temporario.write_text(texto, encoding='utf-8')
+
+
+def _exportada(caminho_json):
+    """Versão do CSV e resolução da última exportação."""
+    try:
+        with open(caminho_json, encoding='utf-8') as arquivo:
+            exportado = json.load(arquivo)
+        return exportado['versao'], exportado['frequencia']
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _html(empresa, resumo, tabelas, graficos, gerado_em):
+    nome = html.escape(empresa.nome)
+    partes = [
+        f'<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>Reclame Aqui · {nome}</title>',
+        '<style>body{font-family:sans-serif;max-width:1100px;margin:auto;padding:1em}'
+        'table{border-collapse:collapse;margin:1em 0}td,th{border:1px solid #ccc;padding:4px 8px}</style>',
+        '</head><body>',
+        f'<h1>Reclamações no portal Reclame Aqui sobre a empresa {nome}</h1>',
+        f'<p>{resumo["reclamacoes"]} reclamações de {resumo["inicio"]} a {resumo["fim"]}. '
+        f'Gerado em {gerado_em}.</p>',
+    ]
+    if resumo['datas_invalidas']:
+        partes.append(f'<p>{resumo["datas_invalidas"]} reclamações com datas inválidas foram descartadas.</p>')
+    for numero, (chave, figura) in enumerate(graficos.items()):
+        partes.append(f'<h2>{html.escape(figuras.SUBTITULOS[chave])}</h2>')
+        # O plotly.js entra uma vez, na primeira figura
+        partes.append(figura.to_html(full_html=False, include_plotlyjs=numero == 0))
+    for titulo, tabela in tabelas.items():
+        partes.append(f'<h2>{html.escape(titulo.replace("_", " ").capitalize())}</h2>')
+        partes.append(tabela.to_html(index=False, border=0))
+    partes.append('</body></html>')
+    return '\n'.join(partes)
+
+
+def exportar_empresa(empresa, saida=DIRETORIO_SAIDA, frequencia='D', forcar=False):
+    """Grava o HTML e o JSON de uma empresa, a menos que o CSV e a resolução não tenham mudado."""
+    inicio = time.perf_counter()
+    saida = Path(saida)
+    versao = list(dados.versao_arquivo(empresa.caminho))
+    destino_json, destino_html = saida / f'{empresa.codigo}.json', saida / f'{empresa.codigo}.html'
+    if not forcar and destino_html.exists() and _exportada(destino_json) == (versao, frequencia):
+        return Exportacao(empresa.codigo, 'inalterada', time.perf_counter() - inicio)
+
+    preparo = paralelo.preparar(empresa.caminho)
+    # A detecção de cada empresa não depende das outras
+    deteccao = anomalias.atualizar(None, {empresa.caminho: preparo.agregados.diario}, config.METODO_ANOMALIAS)
+    alertas = anomalias.alertas(deteccao, empresa.caminho)
+    resumo, tabelas = resumo_empresa(preparo.agregados, termos.atualizar(empresa.caminho), alertas)
+    graficos = figuras.figuras_empresa(preparo.agregados, frequencia, alertas)
+    gerado_em = datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+    saida.mkdir(parents=True, exist_ok=True)
+    _gravar(destino_html, _html(empresa, resumo, tabelas, graficos, gerado_em))
+    # A versão é gravada por último, no JSON, para que uma exportação interrompida seja refeita
+    _gravar(destino_json, json.dumps({
+        'codigo': empresa.codigo,
+        'nome': empresa.nome,
+        'versao': versao,
+        'gerado_em': gerado_em,
+        'frequencia': frequencia,
+        'resumo': resumo,
+        'tabelas': {titulo: tabela.to_dict(orient='records') for titulo, tabela in tabelas.items()},
+        'figuras': {chave: json.loads(figura.to_json()) for chave, figura in graficos.items()},
+    }, ensure_ascii=False))
+    return Exportacao(empresa.codigo, 'exportada', time.perf_counter() - inicio)
+
+
+def gravar_indice(saida=DIRETORIO_SAIDA):
+    """Grava o `index.html` com todas as empresas já exportadas em `saida`."""
+    saida = Path(saida)
+    saida.mkdir(parents=True, exist_ok=True)
+    linhas = []
+    for caminho in sorted(saida.glob('*.json')):
+        try:
+            with open(caminho, encoding='utf-8') as arquivo:
+                exportado = json.load(arquivo)
+            codigo, nome = html.escape(exportado['codigo']), html.escape(exportado['nome'])
+            linhas.append(
+                f'<tr><td><a href="{codigo}.html">{nome}</a></td>'
+                f'<td>{exportado["resumo"]["reclamacoes"]}</td><td>{exportado["gerado_em"]}</td></tr>'
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            continue
+    _gravar(saida / 'index.html', '\n'.join([
+        '<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>Reclame Aqui</title></head><body>',
+        '<h1>Reclamações no portal Reclame Aqui</h1>',
+        '<table><tr><th>Empresa</th><th>Reclamações</th><th>Gerado em</th></tr>',
+        *linhas,
+        '</table></body></html>',
+    ]))
+
+
+def exportar(empresas, saida=DIRETORIO_SAIDA, frequencia='D', forcar=False, trabalhadores=config.TRABALHADORES_PREPARO):
+    """Exporta as empresas em paralelo; devolve as `Exportacao` e as empresas que falharam."""
+    trabalhadores = max(1, min(trabalhadores or paralelo.nucleos(), len(empresas)))
+    resultados, falhas = [], []
+    if trabalhadores == 1:
+        for empresa in empresas:
+            try:
+                resultados.append(exportar_empresa(empresa, saida, frequencia, forcar))
+            except Exception:
+                logger.exception("Falha ao exportar %s.", empresa.codigo)
+                falhas.append(empresa.codigo)
+    else:
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(trabalhadores, mp_context=contexto) as executor:
+            futuros = {
+                executor.submit(exportar_empresa, empresa, saida, frequencia, forcar): empresa.codigo
+                for empresa in empresas
+            }
+            for futuro in as_completed(futuros):
+                try:
+                    resultados.append(futuro.result())
+                except Exception:
+                    logger.exception("Falha ao exportar %s.", futuros[futuro])
+                    falhas.append(futuros[futuro])
+    gravar_indice(saida)
+    return resultados, falhas
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Exporta os dashboards das empresas para HTML e JSON.")
+    parser.add_argument('codigos', nargs='*', help='empresas a exportar (padrão: todas as do registro)')
+    parser.add_argument('--saida', type=Path, default=DIRETORIO_SAIDA, help='diretório dos arquivos gerados')
+    parser.add_argument('--frequencia', choices=list(series.NOMES_FREQUENCIAS), default='D',
+                        help='resolução da série temporal')
+    parser.add_argument('--trabalhadores', type=int, default=config.TRABALHADORES_PREPARO,
+                        help='processos do pool (padrão: um por núcleo)')
+    parser.add_argument('--forcar', action='store_true', help='exporta também as empresas cujo CSV não mudou')
+    opcoes = parser.parse_args(argumentos)
+
+    registradas = registro.descobrir_empresas()
+    desconhecidas = [codigo for codigo in opcoes.codigos if codigo not in registradas]
+    if desconhecidas:
+        parser.error(f"empresas desconhecidas: {', '.join(desconhecidas)}")
+    empresas = [registradas[codigo] for codigo in opcoes.codigos or registradas]
+
+    resultados, falhas = exportar(empresas, opcoes.saida, opcoes.frequencia, opcoes.forcar, opcoes.trabalhadores)
+    for resultado in sorted(resultados):
+        print(f'{resultado.codigo}: {resultado.situacao} em {resultado.segundos:.1f} s')
+    print(f'Relatórios em {opcoes.saida}')
+    if falhas:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    # Pelo módulo importado, para que os trabalhadores do pool encontrem as funções
+    from reclameaqui.exportar import main
+    main()
@@ -0,0 +1,285 @@
+"""Construção dos gráficos do dashboard de uma empresa.
+
+Os gráficos são montados a partir dos agregados (`reclameaqui.agregados`), e
+não das linhas de cada reclamação.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+from reclameaqui import config, series
+from reclameaqui.agregados import LARGURA_CLASSE_TAMANHO
+from reclameaqui.densidade import kde_em_contagens
+from reclameaqui.instrumentacao import medir
+
+
+def figura_numero_reclamacoes(diario, frequencia='D', limite=config.LIMITE_PONTOS_SERIE,
+                              metodo=config.METODO_REDUCAO_SERIE, alertas=None):
+    """Série temporal do número de reclamações por dia, semana ou mês.
+
+    Acima de `limite` pontos, a série é reduzida por `metodo` (veja
+    `reclameaqui.series`). Linha, marcadores e preenchimento saem de um único
+    trace, para que os dados não sejam enviados duas vezes ao navegador.
+    `alertas`, se dado, são os dias atípicos de `reclameaqui.anomalias`,
+    destacados na série (por semana ou mês, os períodos que os contêm).
+    """
+    reamostrada = series.reamostrar(diario, frequencia)
+    reclamacoes_por_data = series.reduzir(reamostrada, limite, metodo)
+    colors = np.linspace(0, 1, len(reclamacoes_por_data))
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=reclamacoes_por_data.index,
+        y=reclamacoes_por_data.to_numpy(),
+        mode='lines+markers',
+        marker=dict(
+            size=8,
+            color=colors,
+            colorscale='Viridis',
+            showscale=True,
+            colorbar=dict(title="Número de Reclamações")
+        ),
+        line=dict(
+            color='royalblue',
+            width=2,
+            dash='solid'
+        ),
+        fill='tozeroy',
+        fillcolor='rgba(0, 100, 255, 0.2)',
+        name='Reclamações',
+        hovertemplate='Data: %{x}<br>Reclamações: %{y}<extra></extra>'
+    ))
+    if alertas is not None and len(alertas):
+        fig.add_trace(_trace_alertas(alertas, reamostrada, frequencia))
+
+    fig.update_layout(
+        title='Série Temporal do Número de Reclamações',
+        xaxis_title='Data',
+        yaxis_title='Número de Reclamações',
+        title_x=0.5,
+        template='plotly_dark',
+        xaxis=dict(
+            showgrid=True,
+            tickangle=-45,
+            type='date'
+        ),
+        yaxis=dict(showgrid=True),
+        hovermode='x',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        legend=dict(
+            x=0.01,
+            y=0.99,
+            bgcolor='rgba(255, 255, 255, 0.2)',
+            bordercolor='lightgrey',
+            borderwidth=1
+        )
+    )
+    fig.update_xaxes(rangeslider_visible=True)
+    return fig
+
+
+def _trace_alertas(alertas, reamostrada, frequencia):
+    """Marcadores dos dias atípicos sobre a série reamostrada em `frequencia`."""
+    if frequencia == 'D':
+        x, y, extra = alertas['data'], alertas['reclamacoes'].to_numpy(), alertas['esperado'].to_numpy()
+        hover = 'Data: %{x}<br>Reclamações: %{y}<br>Esperado: %{customdata}<extra>Dia atípico</extra>'
+    else:
+        dias = series.reamostrar(pd.Series(1, index=pd.DatetimeIndex(alertas['data'])).sort_index(), frequencia)
+        dias = dias[dias > 0]
+        x, y, extra = dias.index, reamostrada.reindex(dias.index).to_numpy(), dias.to_numpy()
+        hover = 'Data: %{x}<br>Reclamações: %{y}<br>Dias atípicos: %{customdata}<extra></extra>'
+    return go.Scatter(
+        x=x,
+        y=y,
+        customdata=extra,
+        mode='markers',
+        marker=dict(symbol='x', size=12, color='crimson', line=dict(width=1, color='white')),
+        name='Dias atípicos',
+        hovertemplate=hover
+    )
+
+
+def _figura_barras(frequencia, titulo, eixo_x, rotulo_todos):
+    """Gráfico de barras com um menu para destacar cada categoria.
+
+    Todas as barras saem de um único trace; cada opção do menu troca os
+    dados do trace pela barra escolhida, e a última volta a mostrar todas.
+    """
+    categorias = [str(categoria) for categoria in frequencia.index]
+    valores = frequencia.to_numpy(dtype='int64').tolist()
+    # A escala de cores fica fixa quando o menu mostra uma barra só
+    escala = dict(cmin=min(valores), cmax=max(valores)) if valores else {}
+
+    fig = go.Figure(go.Bar(
+        x=categorias,
+        y=valores,
+        text=valores,
+        textposition='auto',
+        marker=dict(color=valores, colorscale='Viridis', **escala),
+        hovertemplate='%{x}<br>Reclamações: %{y}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        title=titulo,
+        xaxis_title=eixo_x,
+        yaxis_title="Número de Reclamações",
+        title_x=0.5,
+        template='plotly_white',
+        xaxis=dict(tickangle=-45),
+        showlegend=False
+    )
+
+    def _dados(x, y):
+        return {'x': [x], 'y': [y], 'text': [y], 'marker.color': [y]}
+
+    buttons = [
+        dict(args=[_dados([categoria], [valor])], label=categoria, method='restyle')
+        for categoria, valor in zip(categorias, valores)
+    ]
+    buttons.append(dict(args=[_dados(categorias, valores)], label=rotulo_todos, method='restyle'))
+
+    fig.update_layout(
+        updatemenus=[{
+            'buttons': buttons,
+            'direction': 'down',
+            'showactive': True,
+            'x': 0.17,
+            'y': 1.15
+        }]
+    )
+    return fig
+
+
+def figura_reclamacao_status(status_frequencia):
+    """Frequência de reclamações por status."""
+    return _figura_barras(status_frequencia, "Frequência de Reclamações por Status", "Status", 'Todos')
+
+
+def figura_estado_reclamacao(reclamacoes_por_estado):
+    """Os 10 estados com mais reclamações."""
+    top_10_estados = reclamacoes_por_estado.nlargest(10)
+    return _figura_barras(top_10_estados, "Top 10 Estados com Mais Reclamações", "Estado", 'Top 10')
+
+
+def classes_exibicao(tamanhos, classes=30):
+    """Agrupa o histograma fino de tamanhos em até `classes` barras.
+
+    Devolve `(contagens, bordas)`, como `np.histogram`.
+    """
+    primeira = int(tamanhos.index.min())
+    fino = np.zeros(int(tamanhos.index.max()) - primeira + 1, dtype='int64')
+    fino[tamanhos.index.to_numpy(dtype='int64') - primeira] = tamanhos.to_numpy()
+    grupo = -(-len(fino) // classes)
+    fino = np.pad(fino, (0, -len(fino) % grupo))
+    contagens = fino.reshape(-1, grupo).sum(axis=1)
+    bordas = (primeira + np.arange(len(contagens) + 1) * grupo) * LARGURA_CLASSE_TAMANHO
+    return contagens, bordas
+
+
+def amostra_rug(valores, contagens, limite):
+    """Até `limite` valores que representam a distribuição dada por `contagens`.
+
+    Acima do limite, usa quantis igualmente espaçados, que sempre incluem o
+    mínimo e o máximo. Cada marca representa então a mesma fração das
+    reclamações.
+    """
+    total = int(contagens.sum())
+    if total <= limite:
+        return np.repeat(valores, contagens)
+    acumulado = np.cumsum(contagens)
+    return valores[np.searchsorted(acumulado, np.linspace(1, total, limite))]
+
+
+def figura_tamanho_descricao(tamanhos, limite_rug=config.LIMITE_PONTOS_RUG):
+    """Histograma do tamanho das descrições com a curva de densidade.
+
+    `tamanhos` é o histograma fino de `reclameaqui.agregados`. O gráfico
+    recebe só as 30 barras, a curva e no máximo `limite_rug` marcas no rug,
+    independentemente do número de reclamações.
+    """
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+
+    if len(tamanhos):
+        contagens, bordas = classes_exibicao(tamanhos)
+        largura_classe = float(bordas[1] - bordas[0])
+        fig.add_trace(go.Bar(
+            x=(bordas[:-1] + bordas[1:]) / 2,
+            y=contagens,
+            width=largura_classe,
+            customdata=np.column_stack([bordas[:-1], bordas[1:]]),
+            marker=dict(color='blue'),
+            name='Reclamações',
+            hovertemplate='Tamanho: %{customdata[0]:.0f} a %{customdata[1]:.0f}<br>Frequência: %{y}<extra></extra>'
+        ), row=2, col=1)
+
+        # Cada classe fina entra na densidade pelo seu ponto central
+        centros = (tamanhos.index.to_numpy(dtype='float64') + 0.5) * LARGURA_CLASSE_TAMANHO
+        with medir('kde', linhas=int(tamanhos.sum())):
+            x_values, y_values = kde_em_contagens(centros, largura_classe, bw_method=0.5, pesos=tamanhos.to_numpy())
+        fig.add_trace(go.Scatter(
+            x=x_values,
+            y=y_values,
+            mode='lines',
+            name='Densidade',
+            line=dict(color='orange', width=2)
+        ), row=2, col=1)
+
+        rug = amostra_rug(centros, tamanhos.to_numpy(), limite_rug)
+        fig.add_trace(go.Scatter(
+            x=rug,
+            y=np.zeros(len(rug)),
+            mode='markers',
+            marker=dict(symbol='line-ns-open', size=12, color='blue'),
+            showlegend=False,
+            hovertemplate='Tamanho: %{x}<extra></extra>'
+        ), row=1, col=1)
+
+    fig.update_layout(
+        title='Distribuição do Tamanho das Descrições',
+        title_x=0.5,
+        template='plotly_white',
+        bargap=0
+    )
+    fig.update_xaxes(title_text='Tamanho da Descrição (número de caracteres)', row=2, col=1)
+    fig.update_yaxes(title_text='Frequência', showgrid=True, row=2, col=1)
+    fig.update_yaxes(visible=False, row=1, col=1)
+    return fig
+
+
+# Gráficos do dashboard de uma empresa, na ordem em que são exibidos
+GRAFICOS = ('numero_reclamacoes', 'estado_reclamacao', 'reclamacao_status', 'tamanho_descricao')
+
+# Subtítulo de cada gráfico no dashboard e nos relatórios exportados
+SUBTITULOS = {
+    'numero_reclamacoes': "Série temporal do número de reclamações.",
+    'estado_reclamacao': "Frequência de reclamações por estado.",
+    'reclamacao_status': "Frequência de cada tipo de status.",
+    'tamanho_descricao': "Distribuição do tamanho do texto.",
+}
+
+# Gráficos que mudam com a resolução da série temporal
+GRAFICOS_COM_FREQUENCIA = ('numero_reclamacoes',)
+
+
+def figura_empresa(chave, agregados, frequencia='D', alertas=None):
+    """O gráfico `chave` do dashboard, ou None se não há o que mostrar.
+
+    `alertas` são os dias atípicos destacados na série temporal.
+    """
+    graficos = {
+        'numero_reclamacoes': lambda: figura_numero_reclamacoes(agregados.diario, frequencia, alertas=alertas),
+        'estado_reclamacao': lambda: figura_estado_reclamacao(agregados.estados),
+        'reclamacao_status': lambda: figura_reclamacao_status(agregados.status),
+        'tamanho_descricao': lambda: figura_tamanho_descricao(agregados.tamanhos),
+    }
+    if chave == 'numero_reclamacoes' and not len(agregados.diario):
+        return None
+    with medir('figura', grafico=chave):
+        return graficos[chave]()
+
+
+def figuras_empresa(agregados, frequencia='D', alertas=None):
+    """Os gráficos do dashboard, na ordem em que são exibidos."""
+    figuras = {chave: figura_empresa(chave, agregados, frequencia, alertas) for chave in GRAFICOS}
+    return {chave: figura for chave, figura in figuras.items() if figura is not None}
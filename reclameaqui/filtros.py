@@ -0,0 +1,101 @@
+"""Índices de linhas para os filtros de período, LOCAL e STATUS.
+
+As linhas vêm do Parquet ordenadas por data, então um período é uma faixa
+contígua de linhas, encontrada por busca binária. Para LOCAL e STATUS, cada
+valor tem a lista ordenada das linhas em que aparece (uma ordenação estável
+pelos códigos da coluna categórica, com o início de cada valor). Aplicar os
+filtros custa proporcional às linhas que sobrevivem, não ao total.
+"""
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+# Colunas dos dados preparados usadas pelos gráficos filtrados
+COLUNAS = ('ID', 'data', 'STATUS', 'LOCAL', 'tamanho_descricao', 'CATEGORIA')
+
+COLUNAS_FILTRO = ('STATUS', 'LOCAL')
+
+
+class Filtro(NamedTuple):
+    inicio: object = None
+    fim: object = None
+    status: tuple = ()
+    locais: tuple = ()
+
+    def ativo(self):
+        return any(valor for valor in self)
+
+
+class OpcoesFiltro(NamedTuple):
+    inicio: object
+    fim: object
+    status: list
+    locais: list
+
+
+class IndiceFiltros(NamedTuple):
+    datas: np.ndarray
+    categorias: dict
+    codigos: dict
+    linhas: dict
+    inicios: dict
+
+
+def construir_indices(DF):
+    """Monta os índices de `DF`, que deve estar ordenado por `data`."""
+    datas = DF['data'].to_numpy(dtype='datetime64[ns]')
+    if len(datas) and (np.diff(datas.astype('int64')) < 0).any():
+        raise ValueError("Os dados devem estar ordenados por data.")
+    categorias, codigos, linhas, inicios = {}, {}, {}, {}
+    for coluna in COLUNAS_FILTRO:
+        valores = DF[coluna].astype('category')
+        categorias[coluna] = valores.cat.categories
+        codigos[coluna] = valores.cat.codes.to_numpy()
+        linhas[coluna] = np.argsort(codigos[coluna], kind='stable').astype('int64')
+        inicios[coluna] = np.searchsorted(codigos[coluna][linhas[coluna]], np.arange(len(categorias[coluna]) + 1))
+    return IndiceFiltros(datas, categorias, codigos, linhas, inicios)
+
+
+def opcoes(indice):
+    """Período (datas, ou None sem linhas) e valores de STATUS e LOCAL disponíveis nos filtros."""
+    inicio = fim = None
+    if len(indice.datas):
+        inicio, fim = (data.astype('datetime64[D]').item() for data in (indice.datas[0], indice.datas[-1]))
+    return OpcoesFiltro(inicio, fim, list(indice.categorias['STATUS']), list(indice.categorias['LOCAL']))
+
+
+def _codigos(indice, coluna, valores):
+    return np.flatnonzero(indice.categorias[coluna].isin(valores))
+
+
+def selecionar(indice, filtro):
+    """Posições das linhas que passam pelo `filtro`, em ordem crescente."""
+    primeira = 0 if filtro.inicio is None else np.searchsorted(indice.datas, np.datetime64(pd.Timestamp(filtro.inicio)))
+    ultima = len(indice.datas) if filtro.fim is None else np.searchsorted(
+        indice.datas, np.datetime64(pd.Timestamp(filtro.fim) + pd.Timedelta(days=1)))
+
+    selecoes = [
+        (coluna, _codigos(indice, coluna, valores))
+        for coluna, valores in (('STATUS', filtro.status), ('LOCAL', filtro.locais)) if valores
+    ]
+    if not selecoes:
+        return np.arange(primeira, ultima)
+
+    # Parte do filtro mais seletivo; cada lista de linhas já está ordenada,
+    # então o período é recortado nela por busca binária
+    def tamanho(selecao):
+        coluna, codigos = selecao
+        return int((indice.inicios[coluna][codigos + 1] - indice.inicios[coluna][codigos]).sum())
+
+    selecoes.sort(key=tamanho)
+    coluna, codigos = selecoes[0]
+    partes = []
+    for codigo in codigos:
+        linhas = indice.linhas[coluna][indice.inicios[coluna][codigo]:indice.inicios[coluna][codigo + 1]]
+        partes.append(linhas[np.searchsorted(linhas, primeira):np.searchsorted(linhas, ultima)])
+    candidatas = np.sort(np.concatenate(partes)) if partes else np.empty(0, dtype='int64')
+
+    for coluna, codigos in selecoes[1:]:
+        candidatas = candidatas[np.isin(indice.codigos[coluna][candidatas], codigos)]
+    return candidatas
@@ -0,0 +1,96 @@
+"""Relatório do tempo de importação na inicialização do dashboard.
+
+Executa um interpretador novo com `python -X importtime`, para que os módulos
+já carregados no processo atual não escondam o custo real, e organiza a saída
+em uma tabela. Uso pela linha de comando:
+
+    python -m reclameaqui.inicializacao [--top N] [--tardios]
+"""
+import argparse
+import re
+import subprocess
+import sys
+
+import pandas as pd
+
+from reclameaqui import dados
+
+# Módulos importados quando o dashboard abre
+MODULOS_INICIAIS = ('streamlit', 'pandas', 'numpy', 'reclameaqui.cache')
+
+# Módulos importados só no primeiro uso (leitura do Parquet)
+MODULOS_TARDIOS = ('pyarrow.parquet',)
+
+# Pacotes cujo custo aparece à parte no relatório; o plotly já é carregado
+# pelo próprio `import streamlit`
+PACOTES_DESTACADOS = ('plotly', 'pyarrow')
+
+_LINHA = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def medir_importacoes(modulos=MODULOS_INICIAIS, python=sys.executable):
+    """Tempo de importação de cada módulo carregado ao importar `modulos`.
+
+    Devolve uma linha por módulo, na ordem em que terminaram de carregar, com
+    o tempo próprio e o acumulado (incluindo dependências) em milissegundos e
+    a profundidade na árvore de importações (0 para os importados direto).
+    """
+    comando = '; '.join(f'import {modulo}' for modulo in modulos)
+    resultado = subprocess.run([python, '-X', 'importtime', '-c', comando], capture_output=True, text=True,
+                               cwd=dados.DIRETORIO_DADOS, check=True)
+    linhas = []
+    for linha in resultado.stderr.splitlines():
+        encontrado = _LINHA.match(linha)
+        if encontrado:
+            proprio, acumulado, recuo, modulo = encontrado.groups()
+            linhas.append((modulo, int(proprio) / 1000, int(acumulado) / 1000, len(recuo) // 2))
+    return pd.DataFrame(linhas, columns=['modulo', 'proprio_ms', 'acumulado_ms', 'profundidade'])
+
+
+def resumo(tabela, top=15):
+    """Os `top` módulos mais caros, pelo tempo acumulado."""
+    return tabela.nlargest(top, 'acumulado_ms').reset_index(drop=True)
+
+
+def custo_pacote(tabela, pacote):
+    """Tempo acumulado de `pacote` e dos seus submódulos, sem contar duas vezes os aninhados."""
+    total = 0.0
+    # Na saída do -X importtime cada módulo vem depois das suas dependências;
+    # de trás para frente, a pilha guarda os módulos que importaram o atual
+    pilha = []
+    for modulo, acumulado, profundidade in zip(tabela['modulo'][::-1], tabela['acumulado_ms'][::-1],
+                                               tabela['profundidade'][::-1]):
+        while pilha and pilha[-1][0] >= profundidade:
+            pilha.pop()
+        dentro = bool(pilha) and pilha[-1][1]
+        do_pacote = modulo == pacote or modulo.startswith(pacote + '.')
+        if do_pacote and not dentro:
+            total += acumulado
+        pilha.append((profundidade, dentro or do_pacote))
+    return total
+
+
+def total_ms(tabela):
+    """Tempo total de importação: soma dos módulos de profundidade 0."""
+    return float(tabela.loc[tabela['profundidade'] == 0, 'acumulado_ms'].sum())
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=15, help='número de módulos listados')
+    parser.add_argument('--tardios', action='store_true', help='mede também os módulos importados sob demanda')
+    opcoes = parser.parse_args(argumentos)
+
+    grupos = {'inicialização': MODULOS_INICIAIS}
+    if opcoes.tardios:
+        grupos['primeiro uso'] = MODULOS_INICIAIS + MODULOS_TARDIOS
+    for nome, modulos in grupos.items():
+        tabela = medir_importacoes(modulos)
+        print(f'{nome}: {total_ms(tabela):.1f} ms ({len(tabela)} módulos)')
+        print(', '.join(f'{pacote}: {custo_pacote(tabela, pacote):.1f} ms' for pacote in PACOTES_DESTACADOS))
+        print(resumo(tabela, opcoes.top).to_string(index=False, float_format='{:.1f}'.format))
+        print()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""Medição do tempo gasto em cada etapa do pipeline.
+
+`medir` cronometra um bloco e registra a duração, as linhas processadas, a
+variação da memória residente e, para as funções em cache, se houve acerto ou
+falta. Cada medição vai para a coleta da execução atual do script, exibida
+no painel de depuração do dashboard, e para o log `reclameaqui.instrumentacao`
+como uma linha JSON. O log só é gravado com `config.LOG_MEDICOES` (variável
+`RECLAMEAQUI_LOG_MEDICOES`) ou com outro handler em nível INFO; sem ele, o
+JSON nem é montado.
+"""
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from reclameaqui import config
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+try:
+    _PAGINA = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGINA = None
+
+
+def memoria_residente():
+    """Memória residente do processo em bytes, ou None onde não há /proc."""
+    if _PAGINA is None:
+        return None
+    try:
+        with open('/proc/self/statm') as arquivo:
+            return int(arquivo.read().split()[1]) * _PAGINA
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def tamanho_bytes(objeto):
+    """Memória aproximada de um resultado em cache, em bytes.
+
+    Conta DataFrames, Series e Index (com os textos), arrays NumPy, figuras
+    do plotly (pelo tamanho do JSON) e as tuplas, listas e dicionários que os
+    agrupam; os demais objetos entram pelo `sys.getsizeof`.
+    """
+    if hasattr(objeto, 'memory_usage'):
+        uso = objeto.memory_usage(deep=True)
+        return int(uso.sum()) if hasattr(uso, 'sum') else int(uso)
+    if hasattr(objeto, 'nbytes'):
+        return int(objeto.nbytes)
+    if hasattr(objeto, 'to_plotly_json'):
+        return len(objeto.to_json())
+    if isinstance(objeto, dict):
+        return sys.getsizeof(objeto) + sum(tamanho_bytes(chave) + tamanho_bytes(valor) for chave, valor in objeto.items())
+    if isinstance(objeto, (tuple, list, set, frozenset)):
+        return sys.getsizeof(objeto) + sum(tamanho_bytes(item) for item in objeto)
+    return sys.getsizeof(objeto)
+
+
+def configurar_log(destino=config.LOG_MEDICOES):
+    """Grava as medições em `destino` ('stderr' ou um arquivo), uma linha JSON por medição."""
+    if not destino or any(getattr(handler, '_medicoes', False) for handler in logger.handlers):
+        return
+    if destino == 'stderr':
+        handler = logging.StreamHandler(sys.stderr)
+    else:
+        handler = logging.FileHandler(destino, encoding='utf-8')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    handler._medicoes = True
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+configurar_log()
+
+
+def _pilha():
+    if not hasattr(_local, 'pilha'):
+        _local.pilha = []
+    return _local.pilha
+
+
+def iniciar_coleta():
+    """Começa uma nova coleta de medições na thread atual e a devolve.
+
+    A coleta é uma lista de dicionários na ordem em que as etapas começaram;
+    cada um é completado quando a etapa termina.
+    """
+    _local.coleta = []
+    return _local.coleta
+
+
+@contextmanager
+def medir(etapa, **contexto):
+    """Mede o bloco como a etapa `etapa`.
+
+    O dicionário devolvido pode receber `linhas` dentro do bloco. A empresa da
+    etapa que envolve esta, se houver, é herdada quando não é informada.
+    """
+    pilha = _pilha()
+    if pilha and 'empresa' in pilha[-1]:
+        contexto.setdefault('empresa', pilha[-1]['empresa'])
+    registro = {'etapa': etapa, 'linhas': None, 'cache': None, **contexto, 'nivel': len(pilha)}
+    coleta = getattr(_local, 'coleta', None)
+    if coleta is not None:
+        coleta.append(registro)
+
+    pilha.append(registro)
+    memoria = memoria_residente()
+    inicio = time.perf_counter()
+    try:
+        yield registro
+    finally:
+        registro['duracao_ms'] = (time.perf_counter() - inicio) * 1000
+        final = memoria_residente()
+        registro['memoria_kb'] = None if memoria is None or final is None else (final - memoria) // 1024
+        pilha.pop()
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps(registro, ensure_ascii=False, default=str), extra={'medicao': registro})
+
+
+def em_cache(linhas=None):
+    """Decorador para o corpo de uma função em cache.
+
+    A chamada é medida como acerto por quem a faz (veja `reclameaqui.cache`);
+    se o corpo chega a executar, a medição passa a ser uma falta, com as linhas
+    calculadas por `linhas(resultado)`.
+    """
+    def decorador(funcao):
+        @functools.wraps(funcao)
+        def envolvida(*argumentos, **opcoes):
+            pilha = _pilha()
+            registro = pilha[-1] if pilha and pilha[-1]['cache'] is not None else None
+            if registro is not None:
+                registro['cache'] = 'falta'
+            resultado = funcao(*argumentos, **opcoes)
+            if registro is not None and linhas is not None:
+                registro['linhas'] = linhas(resultado)
+            return resultado
+        return envolvida
+    return decorador
+
+
+def tabela(coleta):
+    """Coleta como DataFrame, com a etapa recuada pelo nível de aninhamento."""
+    import pandas as pd
+
+    colunas = ['etapa', 'empresa', 'grafico', 'cache', 'linhas', 'duracao_ms', 'memoria_kb']
+    DF = pd.DataFrame(coleta).reindex(columns=colunas + ['nivel'])
+    if len(DF):
+        DF['etapa'] = ['· ' * int(nivel) + etapa for nivel, etapa in zip(DF['nivel'], DF['etapa'])]
+    return DF[colunas]
@@ -0,0 +1,27 @@
+"""Componentes de interface compartilhados entre as páginas do dashboard."""
+import streamlit as st
+
+from reclameaqui.cache import opcoes_filtro
+from reclameaqui.filtros import Filtro
+
+
+def filtro_lateral(empresa):
+    """Campos de período, STATUS e LOCAL da empresa; devolve o `Filtro` escolhido.
+
+    Deve ser chamada dentro do menu lateral. As chaves dos campos incluem o
+    código da empresa, então cada empresa guarda a sua seleção.
+    """
+    filtro = Filtro()
+    opcoes = opcoes_filtro(empresa.caminho)
+    if opcoes.inicio is not None:
+        menor, maior = opcoes.inicio, opcoes.fim
+        periodo = st.date_input("Período", value=(menor, maior), min_value=menor, max_value=maior,
+                                key=f"periodo_{empresa.codigo}")
+        inicio, fim = (tuple(periodo) + (None, None))[:2]
+        filtro = filtro._replace(
+            inicio=None if inicio in (None, menor) else inicio,
+            fim=None if fim in (None, maior) else fim,
+        )
+    status = st.multiselect("Status", opcoes.status, key=f"status_{empresa.codigo}")
+    locais = st.multiselect("Local", opcoes.locais, key=f"locais_{empresa.codigo}")
+    return filtro._replace(status=tuple(status), locais=tuple(locais))
@@ -0,0 +1,58 @@
+"""Navegação paginada pelas reclamações de uma empresa.
+
+A ordem das linhas que passam pelos filtros é calculada uma vez, a partir
+dos índices de `reclameaqui.filtros`: as linhas já vêm ordenadas por data, e
+cada índice de STATUS e LOCAL é uma ordenação estável pelos códigos da
+coluna, isto é, por valor e depois por data. Virar a página é recortar esse
+vetor de posições e ler os textos só das linhas exibidas, com custo que não
+depende do total de reclamações.
+"""
+import numpy as np
+
+from reclameaqui import filtros
+
+# Colunas mantidas em memória para exibir as reclamações
+COLUNAS = ('data', 'STATUS', 'LOCAL', 'TEMA')
+
+ORDENACOES = {'data': "Data", 'STATUS': "Status", 'LOCAL': "Local"}
+
+# Caracteres com significado no markdown do Streamlit ($ abre fórmulas do KaTeX)
+_MARKDOWN = str.maketrans({caractere: '\\' + caractere for caractere in '\\`*_[]$~'})
+
+
+def ordenar(indice, filtro, chave='data', decrescente=False):
+    """Posições das linhas que passam pelo `filtro`, na ordem de `chave` (e depois da data)."""
+    if chave not in ORDENACOES:
+        raise ValueError(f"Ordenação desconhecida: {chave!r}")
+    linhas = filtros.selecionar(indice, filtro)
+    if chave != 'data':
+        if len(linhas) < len(indice.datas):
+            mascara = np.zeros(len(indice.datas), dtype=bool)
+            mascara[linhas] = True
+            linhas = indice.linhas[chave][mascara[indice.linhas[chave]]]
+        else:
+            linhas = indice.linhas[chave]
+    return linhas[::-1] if decrescente else linhas
+
+
+def paginas(ordem, tamanho):
+    """Número de páginas de `tamanho` linhas (ao menos uma)."""
+    return max(1, -(-len(ordem) // tamanho))
+
+
+def pagina(ordem, numero, tamanho):
+    """Posições das linhas da página `numero`, contada a partir de 1."""
+    return ordem[(numero - 1) * tamanho:numero * tamanho]
+
+
+def trecho(texto, tamanho):
+    """Início de `texto` com até `tamanho` caracteres, cortado no fim de uma palavra."""
+    texto = texto if isinstance(texto, str) else ''
+    if len(texto) <= tamanho:
+        return texto
+    return texto[:tamanho].rsplit(' ', 1)[0] + '...'
+
+
+def escapar(texto):
+    """`texto` para exibir literalmente com `st.markdown` ou `st.write` (vazio se não for texto)."""
+    return texto.translate(_MARKDOWN) if isinstance(texto, str) else ''
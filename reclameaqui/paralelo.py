@@ -0,0 +1,140 @@
+"""Preparo das empresas em paralelo.
+
+As empresas são independentes: a conversão de cada CSV para Parquet e a
+atualização dos seus repositórios de agregados e de termos rodam em um pool de processos (ou
+de threads, com `config.POOL_PREPARO`), e só os agregados, pequenos, voltam ao
+processo do Streamlit. Os arquivos gravados em `.cache/` pelos trabalhadores
+servem depois às demais etapas.
+
+O Streamlit executa cada página como `__main__`, e um processo iniciado por
+`spawn` reexecutaria a página. Por isso o pool de processos roda em um
+interpretador à parte, que também pode ser usado para preparar os caches
+antes de abrir o dashboard:
+
+    python -m reclameaqui.paralelo [--trabalhadores N] [CSV ...]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import pickle
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+
+from reclameaqui import agregados, colunar, config, dados, registro, termos
+from reclameaqui.instrumentacao import medir
+
+logger = logging.getLogger(__name__)
+
+
+class Preparo(NamedTuple):
+    caminho: str
+    versao: tuple
+    agregados: agregados.Agregados
+    segundos: float
+
+
+def preparar(caminho):
+    """Converte o CSV da empresa para Parquet e atualiza os seus agregados e termos."""
+    inicio = time.perf_counter()
+    versao = dados.versao_arquivo(caminho)
+    colunar.garantir_parquet(caminho)
+    resultado = agregados.atualizar(caminho)
+    termos.atualizar(caminho)
+    return Preparo(str(caminho), versao, resultado, time.perf_counter() - inicio)
+
+
+def pendentes(caminhos):
+    """Os CSVs cujo Parquet ou repositório de agregados ou de termos está desatualizado."""
+    return [
+        str(caminho) for caminho in caminhos
+        if not (colunar.em_dia(caminho) and agregados.em_dia(caminho)
+                and agregados.em_dia(caminho, termos.caminho_repositorio(caminho)))
+    ]
+
+
+def nucleos():
+    """Núcleos disponíveis para este processo."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def _em_pool(caminhos, executor):
+    resultados = {}
+    with executor:
+        futuros = {executor.submit(preparar, caminho): caminho for caminho in caminhos}
+        for futuro in as_completed(futuros):
+            try:
+                preparo = futuro.result()
+            except Exception:
+                logger.exception("Falha ao preparar %s.", futuros[futuro])
+                continue
+            resultados[preparo.caminho] = preparo
+    return resultados
+
+
+def _em_processos(caminhos, trabalhadores):
+    """Roda o pool de processos no interpretador à parte de `main`."""
+    comando = [sys.executable, '-m', __name__, '--trabalhadores', str(trabalhadores), '--pickle', *caminhos]
+    try:
+        resultado = subprocess.run(comando, stdout=subprocess.PIPE, cwd=dados.DIRETORIO_DADOS, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        logger.exception("Falha no preparo em paralelo; as empresas serão preparadas quando usadas.")
+        return {}
+    return pickle.loads(resultado.stdout)
+
+
+def preparar_empresas(caminhos, trabalhadores=config.TRABALHADORES_PREPARO, pool=config.POOL_PREPARO):
+    """Prepara em paralelo as empresas com caches desatualizados.
+
+    Devolve os `Preparo` indexados pelo caminho. Uma empresa que falhar é
+    registrada no log e fica de fora; ela é preparada de novo, no processo do
+    Streamlit, quando for usada. Com um só trabalhador ou uma só empresa, não
+    há pool.
+    """
+    caminhos = pendentes(caminhos)
+    trabalhadores = min(trabalhadores or nucleos(), len(caminhos))
+    with medir('preparo_paralelo', linhas=len(caminhos), trabalhadores=trabalhadores):
+        if trabalhadores > 1 and pool == 'threads':
+            return _em_pool(caminhos, ThreadPoolExecutor(trabalhadores))
+        if trabalhadores > 1:
+            return _em_processos(caminhos, trabalhadores)
+        resultados = {}
+        for caminho in caminhos:
+            try:
+                resultados[caminho] = preparar(caminho)
+            except Exception:
+                logger.exception("Falha ao preparar %s.", caminho)
+        return resultados
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Prepara os caches das empresas em um pool de processos.")
+    parser.add_argument('caminhos', nargs='*', help='CSVs das empresas (padrão: todas as do registro)')
+    parser.add_argument('--trabalhadores', type=int, default=config.TRABALHADORES_PREPARO,
+                        help='processos do pool (padrão: um por núcleo)')
+    parser.add_argument('--pickle', action='store_true', help='grava os resultados em pickle na saída padrão')
+    opcoes = parser.parse_args(argumentos)
+
+    caminhos = opcoes.caminhos or [str(empresa.caminho) for empresa in registro.descobrir_empresas().values()]
+    caminhos = pendentes(caminhos)
+    trabalhadores = max(1, min(opcoes.trabalhadores or nucleos(), len(caminhos)))
+    resultados = _em_pool(caminhos, ProcessPoolExecutor(trabalhadores, mp_context=multiprocessing.get_context('spawn')))
+
+    if opcoes.pickle:
+        pickle.dump(resultados, sys.stdout.buffer)
+        return
+    for preparo in resultados.values():
+        print(f'{preparo.caminho}: {int(preparo.agregados.diario.sum())} reclamações em {preparo.segundos:.1f} s')
+    print(f'{len(resultados)} de {len(caminhos)} empresas preparadas com {trabalhadores} processos')
+
+
+if __name__ == '__main__':
+    # Pelo módulo importado, para que os resultados em pickle não apontem para __main__
+    from reclameaqui.paralelo import main
+    main()
@@ -0,0 +1,73 @@
+"""Figuras prontas: os gráficos já montados, guardados entre as execuções do script.
+
+Montar um `go.Figure` valida cada trace e cada atributo. `CacheFiguras`
+guarda as figuras já montadas de cada gráfico, com descarte da menos usada
+quando o tamanho do JSON delas passa de um limite de memória, e as devolve
+ao `st.plotly_chart` sem montar os objetos do plotly de novo. As figuras são
+compartilhadas entre as sessões e devem ser tratadas como somente leitura.
+"""
+import threading
+from collections import OrderedDict
+
+from reclameaqui.instrumentacao import tamanho_bytes
+
+
+class CacheFiguras:
+    """Cache LRU de figuras (ou None), limitado pelo tamanho total do JSON delas."""
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self._trava = threading.Lock()
+        # chave -> (figura, bytes)
+        self._entradas = OrderedDict()
+        self._bytes = 0
+
+    def obter(self, chave, montar):
+        """Figura guardada em `chave`, montando-a com `montar()` se necessário.
+
+        Devolve `(figura, acerto)`.
+        """
+        with self._trava:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                self._entradas.move_to_end(chave)
+        if entrada is not None:
+            return entrada[0], True
+
+        figura = montar()
+        tamanho = tamanho_bytes(figura)
+        with self._trava:
+            if chave not in self._entradas and tamanho <= self.limite_bytes:
+                self._entradas[chave] = (figura, tamanho)
+                self._bytes += tamanho
+                while self._bytes > self.limite_bytes:
+                    _, (_, antigo) = self._entradas.popitem(last=False)
+                    self._bytes -= antigo
+        return figura, False
+
+    def descartar(self, condicao):
+        """Remove as entradas cuja chave satisfaz `condicao`."""
+        with self._trava:
+            for chave in [chave for chave in self._entradas if condicao(chave)]:
+                self._bytes -= self._entradas.pop(chave)[1]
+
+    def bytes_por(self, agrupar):
+        """Bytes de JSON guardados, somados por `agrupar(chave)`."""
+        totais = {}
+        with self._trava:
+            for chave, (_, tamanho) in self._entradas.items():
+                grupo = agrupar(chave)
+                totais[grupo] = totais.get(grupo, 0) + tamanho
+        return totais
+
+    def limpar(self):
+        with self._trava:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    @property
+    def bytes(self):
+        return self._bytes
@@ -0,0 +1,53 @@
+"""Registro das empresas disponíveis no dashboard.
+
+Por padrão, cada arquivo `RECLAMEAQUI_<CODIGO>.csv` do diretório de dados é
+uma empresa, exibida com o código em formato de título ("IBYTE" vira
+"Ibyte"). Um manifesto opcional `empresas.json` no mesmo diretório substitui
+a descoberta e permite escolher nomes e arquivos:
+
+    {"IBYTE": {"nome": "Ibyte", "arquivo": "RECLAMEAQUI_IBYTE.csv"}}
+"""
+import json
+from pathlib import Path
+from typing import NamedTuple
+
+from reclameaqui import dados
+
+PADRAO_ARQUIVOS = 'RECLAMEAQUI_*.csv'
+MANIFESTO = 'empresas.json'
+
+
+class Empresa(NamedTuple):
+    codigo: str
+    nome: str
+    caminho: Path
+
+
+def versao_registro(diretorio=dados.DIRETORIO_DADOS):
+    """Muda sempre que um arquivo é criado ou removido no diretório, ou o manifesto é alterado."""
+    diretorio = Path(diretorio)
+    manifesto = diretorio / MANIFESTO
+    return (
+        dados.versao_arquivo(diretorio),
+        dados.versao_arquivo(manifesto) if manifesto.exists() else None,
+    )
+
+
+def descobrir_empresas(diretorio=dados.DIRETORIO_DADOS):
+    """Empresas disponíveis, indexadas pelo código e em ordem alfabética."""
+    diretorio = Path(diretorio)
+    manifesto = diretorio / MANIFESTO
+    if manifesto.exists():
+        with open(manifesto, encoding='utf-8') as arquivo:
+            entradas = json.load(arquivo)
+        empresas = [
+            Empresa(codigo, entrada.get('nome', codigo.title()), diretorio / entrada['arquivo'])
+            for codigo, entrada in entradas.items()
+        ]
+    else:
+        prefixo = PADRAO_ARQUIVOS.split('*')[0]
+        empresas = [
+            Empresa(caminho.stem[len(prefixo):], caminho.stem[len(prefixo):].title(), caminho)
+            for caminho in diretorio.glob(PADRAO_ARQUIVOS)
+        ]
+    return {empresa.codigo: empresa for empresa in sorted(empresas)}
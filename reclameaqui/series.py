@@ -0,0 +1,78 @@
+"""Reamostragem e redução de pontos da série temporal de reclamações.
+
+A série diária pode ser somada por semana ou por mês. Acima de um orçamento
+de pontos, ela é reduzida preservando a forma: por LTTB (Largest Triangle
+Three Buckets), que mantém picos e vales visualmente relevantes, ou por
+mínimo/máximo de cada intervalo, que nunca perde um extremo.
+"""
+import numpy as np
+
+# Regras de reamostragem do pandas para cada resolução
+FREQUENCIAS = {'D': None, 'W': 'W-MON', 'M': 'MS'}
+NOMES_FREQUENCIAS = {'D': 'Dia', 'W': 'Semana', 'M': 'Mês'}
+
+
+def reamostrar(diario, frequencia='D'):
+    """Soma a série diária por semana (`'W'`) ou mês (`'M'`).
+
+    Em `'D'` a série é devolvida como está, só com os dias com reclamações.
+    """
+    regra = FREQUENCIAS[frequencia]
+    if regra is None or diario.empty:
+        return diario
+    return diario.resample(regra, label='left', closed='left').sum()
+
+
+def lttb(x, y, limite):
+    """Índices dos `limite` pontos escolhidos pelo LTTB, incluindo o primeiro e o último."""
+    n = len(y)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    # Intervalos internos: o primeiro e o último ponto ficam sempre
+    bordas = np.linspace(1, n - 1, limite - 1).astype('int64')
+    escolhidos = np.empty(limite, dtype='int64')
+    escolhidos[0], escolhidos[-1] = 0, n - 1
+    anterior = 0
+    for i in range(limite - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        proximo_fim = bordas[i + 2] if i + 2 < len(bordas) else n
+        # O terceiro vértice é a média do intervalo seguinte
+        media_x = x[fim:proximo_fim].mean()
+        media_y = y[fim:proximo_fim].mean()
+        areas = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(areas))
+        escolhidos[i + 1] = anterior
+    return escolhidos
+
+
+def minmax(y, limite):
+    """Índices do mínimo e do máximo de cada um de `limite // 2` intervalos."""
+    n = len(y)
+    if limite >= n or limite < 2:
+        return np.arange(n)
+    y = np.asarray(y, dtype='float64')
+    tamanho = -(-n // (limite // 2))
+    # Recalculado para que nenhum intervalo fique só com o preenchimento
+    intervalos = -(-n // tamanho)
+    preenchido = np.pad(y, (0, intervalos * tamanho - n), constant_values=np.nan)
+    blocos = preenchido.reshape(intervalos, tamanho)
+    base = np.arange(intervalos) * tamanho
+    indices = np.concatenate([base + np.nanargmin(blocos, axis=1), base + np.nanargmax(blocos, axis=1)])
+    return np.unique(indices)
+
+
+def reduzir(serie, limite, metodo='lttb'):
+    """A série reduzida a no máximo `limite` pontos pelo `metodo` ('lttb' ou 'minmax')."""
+    if len(serie) <= limite:
+        return serie
+    if metodo == 'minmax':
+        indices = minmax(serie.to_numpy(), limite)
+    else:
+        x = serie.index.to_numpy(dtype='datetime64[ns]').astype('int64')
+        indices = lttb(x, serie.to_numpy(), limite)
+    return serie.iloc[indices]
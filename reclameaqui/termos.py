@@ -0,0 +1,276 @@
+"""Termos e pares de termos mais frequentes por empresa, STATUS e mês.
+
+TEMA e DESCRICAO são quebrados em termos como na busca (sem acentos, sem
+stopwords e no singular), e cada termo ou par de termos seguidos é
+identificado pelo CRC32 do seu texto. As contagens ficam em formato esparso:
+só as combinações de termo, STATUS e mês que ocorrem, cada uma em uma chave
+inteira, em vetores NumPy ordenados. Um termo conta uma vez por reclamação,
+mesmo que apareça no TEMA e na DESCRICAO.
+
+O repositório em `.cache/termos/<nome>.npz` é atualizado como o de
+`reclameaqui.agregados`: só as linhas acrescentadas ao CSV são tokenizadas.
+Dois textos com o mesmo CRC32 são contados juntos, com o texto do primeiro.
+"""
+import zlib
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from reclameaqui import armazenamento, busca, colunar, config
+from reclameaqui.agregados import Acrescimo
+from reclameaqui.instrumentacao import medir
+
+# Colunas do CSV lidas para as contagens
+COLUNAS_CSV = ('ID', 'STATUS', 'TEMA', 'DESCRICAO', 'ANO', 'MES', 'DIA')
+
+# Chave de contagem: par de termos (1 bit) | CRC32 | código do STATUS | mês
+_BITS_STATUS = 8
+_BITS_MES = 16
+_DESLOCAMENTO_HASH = _BITS_STATUS + _BITS_MES
+_BIT_PAR = np.uint64(1 << (32 + _DESLOCAMENTO_HASH))
+# Código das reclamações sem STATUS
+_SEM_STATUS = (1 << _BITS_STATUS) - 1
+
+
+class Contagens(NamedTuple):
+    chaves: np.ndarray
+    contagens: np.ndarray
+    hashes: np.ndarray
+    # Textos do vocabulário em UTF-8, concatenados; o do hash i vai de limites[i] a limites[i + 1]
+    textos: np.ndarray
+    limites: np.ndarray
+    status: list
+
+
+def _vazio():
+    return Contagens(
+        chaves=np.empty(0, dtype='uint64'),
+        contagens=np.empty(0, dtype='int64'),
+        hashes=np.empty(0, dtype='uint32'),
+        textos=np.empty(0, dtype='uint8'),
+        limites=np.zeros(1, dtype='int64'),
+        status=[],
+    )
+
+
+def _mes(datas):
+    """Meses desde o ano zero, que cabem em `_BITS_MES` bits."""
+    return np.asarray(datas, dtype='datetime64[M]').astype('int64') + 1970 * 12
+
+
+def _crc32(textos):
+    return np.fromiter((zlib.crc32(texto.encode('utf-8')) for texto in textos), dtype='uint32', count=len(textos))
+
+
+def _ocorrencias(textos):
+    """Termos e pares de termos seguidos de cada texto.
+
+    Devolve as chaves (par de termos e CRC32, já deslocados) e os documentos
+    de cada ocorrência, além do vocabulário encontrado.
+    """
+    termos = busca.extrair_termos(textos.reset_index(drop=True))
+    documentos = termos.index.to_numpy(dtype='int64')
+    codigos, unicos = pd.factorize(termos)
+    unicos = list(unicos)
+
+    # Pares só dentro do mesmo documento; cada par distinto vira texto uma vez
+    seguidos = np.flatnonzero(documentos[1:] == documentos[:-1])
+    pares, codigos_pares = np.unique(codigos[seguidos].astype('int64') * len(unicos) + codigos[seguidos + 1],
+                                     return_inverse=True)
+    textos_pares = [f'{unicos[a]} {unicos[b]}' for a, b in zip(*np.divmod(pares, max(len(unicos), 1)))]
+
+    hashes, hashes_pares = _crc32(unicos), _crc32(textos_pares)
+    chaves = np.concatenate([
+        hashes[codigos].astype('uint64') << np.uint64(_DESLOCAMENTO_HASH),
+        (hashes_pares[codigos_pares].astype('uint64') << np.uint64(_DESLOCAMENTO_HASH)) | _BIT_PAR,
+    ])
+    return chaves, np.concatenate([documentos, documentos[seguidos]]), np.concatenate([hashes, hashes_pares]), \
+        unicos + textos_pares
+
+
+def _codigos_status(serie, status):
+    """Códigos de STATUS das linhas, acrescentando a `status` os rótulos novos."""
+    codigos, rotulos = pd.factorize(serie)
+    posicoes = {rotulo: posicao for posicao, rotulo in enumerate(status)}
+    for rotulo in map(str, rotulos):
+        if rotulo not in posicoes:
+            posicoes[rotulo] = len(status)
+            status.append(rotulo)
+    if len(status) >= _SEM_STATUS:
+        raise ValueError(f'Mais de {_SEM_STATUS - 1} valores de STATUS.')
+    mapa = np.array([posicoes[str(rotulo)] for rotulo in rotulos] + [_SEM_STATUS], dtype='uint64')
+    return mapa[codigos]
+
+
+def contar(DF, status=None):
+    """Contagens esparsas dos termos de um DataFrame preparado.
+
+    `status` é a lista de rótulos de STATUS já codificados, estendida com os
+    novos, para que os códigos de blocos sucessivos sejam compatíveis.
+    """
+    status = [] if status is None else list(status)
+    limite = 1 << _DESLOCAMENTO_HASH
+    if len(DF) > limite:
+        # Os documentos precisam caber abaixo do hash na chave
+        inicio = contar(DF.iloc[:limite], status)
+        return somar(inicio, contar(DF.iloc[limite:], inicio.status))
+    partes = [_ocorrencias(DF[coluna]) for coluna in ('TEMA', 'DESCRICAO')]
+    chaves = np.concatenate([parte[0] for parte in partes])
+    documentos = np.concatenate([parte[1] for parte in partes]).astype('uint64')
+
+    # Uma vez por reclamação: o documento entra na parte baixa da chave até o np.unique
+    chaves = np.unique(chaves | documentos)
+    documentos = (chaves & np.uint64((1 << _DESLOCAMENTO_HASH) - 1)).astype('int64')
+    chaves &= ~np.uint64((1 << _DESLOCAMENTO_HASH) - 1)
+    codigos = _codigos_status(DF['STATUS'], status)
+    meses = _mes(DF['data']).astype('uint64')
+    chaves |= (codigos[documentos] << np.uint64(_BITS_MES)) | meses[documentos]
+    chaves, contagens = np.unique(chaves, return_counts=True)
+
+    hashes = np.concatenate([parte[2] for parte in partes])
+    textos = [texto for parte in partes for texto in parte[3]]
+    hashes, primeiros = np.unique(hashes, return_index=True)
+    codificados = [textos[posicao].encode('utf-8') for posicao in primeiros]
+    return Contagens(
+        chaves=chaves,
+        contagens=contagens.astype('int64'),
+        hashes=hashes,
+        textos=np.frombuffer(b''.join(codificados), dtype='uint8'),
+        limites=np.concatenate([[0], np.cumsum([len(texto) for texto in codificados], dtype='int64')]),
+        status=status,
+    )
+
+
+def _recortar(textos, limites, posicoes):
+    """Textos do vocabulário nas `posicoes`, nessa ordem, e os seus limites."""
+    inicios = limites[:-1][posicoes]
+    tamanhos = limites[1:][posicoes] - inicios
+    novos = np.concatenate([[0], np.cumsum(tamanhos, dtype='int64')])
+    indices = np.arange(novos[-1], dtype='int64') + np.repeat(inicios - novos[:-1], tamanhos)
+    return textos[indices], novos
+
+
+def somar(a, b):
+    """Soma as contagens de linhas distintas; os códigos de `b` devem estender os de `a`."""
+    chaves, inverso = np.unique(np.concatenate([a.chaves, b.chaves]), return_inverse=True)
+    contagens = np.bincount(inverso, weights=np.concatenate([a.contagens, b.contagens])).astype('int64')
+
+    # O vocabulário de `a` é mantido e só os hashes novos de `b` são acrescentados
+    novos = np.flatnonzero(~np.isin(b.hashes, a.hashes))
+    textos, limites = _recortar(b.textos, b.limites, novos)
+    hashes = np.concatenate([a.hashes, b.hashes[novos]])
+    ordem = np.argsort(hashes, kind='stable')
+    textos, limites = _recortar(np.concatenate([a.textos, textos]),
+                                np.concatenate([a.limites, a.limites[-1] + limites[1:]]), ordem)
+    return Contagens(
+        chaves=chaves,
+        contagens=contagens,
+        hashes=hashes[ordem],
+        textos=textos,
+        limites=limites,
+        status=b.status,
+    )
+
+
+def texto(contagens, posicao):
+    """Texto do termo na posição `posicao` do vocabulário."""
+    return contagens.textos[contagens.limites[posicao]:contagens.limites[posicao + 1]].tobytes().decode('utf-8')
+
+
+def mais_frequentes(contagens, ngrama=1, status=(), inicio=None, fim=None, quantidade=20):
+    """Os termos (`ngrama` 1) ou pares de termos (2) em mais reclamações.
+
+    O período é aplicado por mês: entram os meses de `inicio` a `fim`.
+    Devolve um DataFrame com as colunas `termo` e `reclamacoes`.
+    """
+    chaves = contagens.chaves
+    mascara = ((chaves & _BIT_PAR) != 0) == (ngrama == 2)
+    if status:
+        codigos = [posicao for posicao, rotulo in enumerate(contagens.status) if rotulo in status]
+        mascara &= np.isin((chaves >> np.uint64(_BITS_MES)) & np.uint64(_SEM_STATUS), codigos)
+    meses = (chaves & np.uint64((1 << _BITS_MES) - 1)).astype('int64')
+    if inicio is not None:
+        mascara &= meses >= _mes(pd.Timestamp(inicio).to_datetime64())
+    if fim is not None:
+        mascara &= meses <= _mes(pd.Timestamp(fim).to_datetime64())
+
+    # As chaves estão ordenadas por hash, então cada termo é uma faixa contígua
+    hashes = (chaves[mascara] >> np.uint64(_DESLOCAMENTO_HASH)).astype('uint32')
+    if not len(hashes):
+        return pd.DataFrame({'termo': pd.Series(dtype=object), 'reclamacoes': pd.Series(dtype='int64')})
+    inicios = np.flatnonzero(np.r_[True, hashes[1:] != hashes[:-1]])
+    totais = np.add.reduceat(contagens.contagens[mascara], inicios)
+    hashes = hashes[inicios]
+
+    melhores = np.argsort(-totais, kind='stable')[:quantidade]
+    posicoes = np.searchsorted(contagens.hashes, hashes[melhores])
+    return pd.DataFrame({
+        'termo': [texto(contagens, posicao) for posicao in posicoes],
+        'reclamacoes': totais[melhores],
+    })
+
+
+def caminho_repositorio(caminho_csv):
+    """Caminho do repositório de termos correspondente a um CSV."""
+    return colunar.DIRETORIO_CACHE / 'termos' / (Path(caminho_csv).stem + '.npz')
+
+
+def _montar_repositorio(estado, arquivo):
+    contagens = Contagens(
+        chaves=arquivo['chaves'],
+        contagens=arquivo['contagens'],
+        hashes=arquivo['hashes'],
+        textos=arquivo['textos'],
+        limites=arquivo['limites'],
+        status=estado.pop('status'),
+    )
+    return contagens, arquivo['ids'], estado
+
+
+def _gravar_repositorio(caminho, contagens, ids, estado):
+    armazenamento.gravar_npz(
+        caminho,
+        {**estado, 'status': contagens.status},
+        ids=ids,
+        chaves=contagens.chaves,
+        contagens=contagens.contagens,
+        hashes=contagens.hashes,
+        textos=contagens.textos,
+        limites=contagens.limites,
+    )
+
+
+def atualizar(caminho_csv, tamanho_bloco=config.TAMANHO_BLOCO):
+    """Devolve as contagens de termos do CSV, tokenizando só as linhas acrescentadas desde a última vez."""
+    destino = caminho_repositorio(caminho_csv)
+    contagens, ids, estado = armazenamento.ler_npz(destino, _montar_repositorio) or (None, None, None)
+    acrescimo = Acrescimo(caminho_csv, estado, ids, COLUNAS_CSV)
+    if acrescimo.completo():
+        return contagens
+    if acrescimo.do_zero:
+        contagens = _vazio()
+
+    with medir('contagem_termos') as medicao:
+        medicao['linhas'] = 0
+        for DF in acrescimo.blocos(tamanho_bloco):
+            medicao['linhas'] += len(DF)
+            contagens = somar(contagens, contar(DF, contagens.status))
+
+    _gravar_repositorio(destino, contagens, acrescimo.ids, acrescimo.estado)
+    return contagens
+
+
+def figura_termos(frequentes, titulo='Termos mais frequentes'):
+    """Gráfico de barras horizontais dos termos, o mais frequente no topo."""
+    fig = go.Figure(go.Bar(
+        x=frequentes['reclamacoes'][::-1],
+        y=frequentes['termo'][::-1],
+        orientation='h',
+        hovertemplate='%{y}<br>Reclamações: %{x}<extra></extra>',
+    ))
+    fig.update_layout(title=titulo, title_x=0.5, xaxis_title='Reclamações', yaxis_title='',
+                      height=max(400, 22 * len(frequentes) + 120))
+    return fig
@@ -0,0 +1,127 @@
+"""Os repositórios incrementais devem coincidir com o cálculo do zero.
+
+Os agregados e as contagens de termos são atualizados só com as linhas
+acrescentadas ao CSV, e a detecção de dias atípicos só a partir do primeiro
+dia que mudou; em todos os casos o resultado tem de ser o mesmo de recalcular
+tudo a partir do arquivo inteiro.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks import gerador
+from reclameaqui import agregados, anomalias, armazenamento, colunar, dados, termos
+
+TAMANHO_BLOCO = 50
+
+
+@pytest.fixture(autouse=True)
+def cache_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(colunar, 'DIRETORIO_CACHE', tmp_path / '.cache')
+
+
+@pytest.fixture
+def csv(tmp_path):
+    caminho = tmp_path / 'RECLAMEAQUI_TESTE.csv'
+    gerador.gerar(300, semente=1).to_csv(caminho, index=False)
+    return caminho
+
+
+def _acrescentar(caminho):
+    """Acrescenta linhas novas, uma com ID já visto e outra sem ID."""
+    novas = gerador.gerar(200, semente=2, primeiro_id=301)
+    repetida = gerador.gerar(1, semente=3, primeiro_id=5)
+    repetida['STATUS'] = 'Repetida'
+    sem_id = gerador.gerar(1, semente=4).astype({'ID': 'Int64'})
+    sem_id['ID'] = pd.NA
+    pd.concat([novas, repetida, sem_id]).to_csv(caminho, index=False, header=False, mode='a')
+
+
+def _editar_trecho_lido(caminho):
+    """Troca um STATUS no meio do arquivo sem mudar o tamanho dele."""
+    conteudo = caminho.read_bytes()
+    posicao = conteudo.index(b'Resolvido', len(conteudo) // 2)
+    caminho.write_bytes(conteudo[:posicao] + b'Resolvid0' + conteudo[posicao + 9:])
+    # Garante um mtime diferente mesmo com a resolução do sistema de arquivos
+    instante = os.stat(caminho).st_mtime_ns + 10**9
+    os.utime(caminho, ns=(instante, instante))
+
+
+def _do_zero(caminho, colunas):
+    return dados.preparar_dados(pd.read_csv(caminho, dtype=dados.ESQUEMA, usecols=list(colunas)))
+
+
+def _incremental(caminho, repositorio):
+    """Se a próxima atualização do repositório lê só as linhas acrescentadas."""
+    ids, estado = armazenamento.ler_npz(repositorio, lambda estado, arquivo: (arquivo['ids'], estado))
+    return not agregados.Acrescimo(caminho, estado, ids).do_zero
+
+
+def _comparar_agregados(obtido, esperado):
+    for campo in ('diario', 'status', 'estados', 'tamanhos'):
+        pd.testing.assert_series_equal(getattr(obtido, campo), getattr(esperado, campo), check_names=False)
+    assert obtido.datas_invalidas == esperado.datas_invalidas
+
+
+def _comparar_termos(obtido, esperado):
+    for ngrama in (1, 2):
+        pd.testing.assert_frame_equal(termos.mais_frequentes(obtido, ngrama, quantidade=None),
+                                      termos.mais_frequentes(esperado, ngrama, quantidade=None))
+
+
+def test_agregados_acrescimo_igual_ao_do_zero(csv):
+    agregados.atualizar(csv, TAMANHO_BLOCO)
+    _acrescentar(csv)
+    assert _incremental(csv, agregados.caminho_repositorio(csv))
+
+    obtido = agregados.atualizar(csv, TAMANHO_BLOCO)
+    _comparar_agregados(obtido, agregados.agregar(_do_zero(csv, agregados.COLUNAS_CSV)))
+    assert 'Repetida' not in obtido.status.index
+    assert agregados.em_dia(csv)
+
+
+def test_agregados_edicao_do_trecho_lido_reconstroi(csv):
+    agregados.atualizar(csv, TAMANHO_BLOCO)
+    _editar_trecho_lido(csv)
+    assert not agregados.em_dia(csv)
+
+    obtido = agregados.atualizar(csv, TAMANHO_BLOCO)
+    _comparar_agregados(obtido, agregados.agregar(_do_zero(csv, agregados.COLUNAS_CSV)))
+    assert obtido.status['Resolvid0'] == 1
+
+
+def test_termos_acrescimo_igual_ao_do_zero(csv):
+    termos.atualizar(csv, TAMANHO_BLOCO)
+    _acrescentar(csv)
+    assert _incremental(csv, termos.caminho_repositorio(csv))
+
+    _comparar_termos(termos.atualizar(csv, TAMANHO_BLOCO), termos.contar(_do_zero(csv, termos.COLUNAS_CSV)))
+
+
+def test_termos_edicao_do_trecho_lido_reconstroi(csv):
+    termos.atualizar(csv, TAMANHO_BLOCO)
+    _editar_trecho_lido(csv)
+
+    _comparar_termos(termos.atualizar(csv, TAMANHO_BLOCO), termos.contar(_do_zero(csv, termos.COLUNAS_CSV)))
+
+
+@pytest.mark.parametrize('metodo', list(anomalias.METODOS))
+def test_anomalias_atualizar_igual_ao_do_zero(metodo):
+    rng = np.random.default_rng(0)
+    datas = pd.date_range('2022-01-01', periods=200, freq='D', name='data')
+    diarios = {
+        'a': pd.Series(rng.poisson(5, len(datas)), index=datas),
+        # Começa depois e tem dias sem reclamações
+        'b': pd.Series(rng.poisson(2, 150), index=datas[50:]).loc[lambda serie: serie > 0],
+    }
+    anterior = anomalias.atualizar(None, {codigo: serie.iloc[:-30] for codigo, serie in diarios.items()}, metodo)
+    # Um dia já detectado também muda
+    diarios['a'].iloc[120] += 40
+
+    obtido = anomalias.atualizar(anterior, diarios, metodo)
+    esperado = anomalias.atualizar(None, diarios, metodo)
+    for campo in ('contagens', 'esperado', 'escala', 'pontuacao'):
+        np.testing.assert_array_equal(getattr(obtido, campo), getattr(esperado, campo))
+    assert obtido.atipicos[120, 0]